@@ -1,47 +1,120 @@
 import argparse
-import glob
+import collections
+import concurrent.futures
+import contextlib
+import json
 import os
 import time
-import gurobipy as gp
 
 import ssplib
 models = dict(
     arcflow=ssplib.arcflow,
     larcflow=ssplib.larcflow,
     reflect=ssplib.reflect,
+    mitm=ssplib.mitm,
 )
 
+Result = collections.namedtuple('Result', [
+    'block', 'idx', 'model', 'status', 'obj', 'nb_vars', 'nb_constrs', 'nb_nzs', 'dt_model', 'dt_solve',
+])
+
+
+def read_done(name):
+    # keys (block, idx, model) of all results already written to the output
+    done = set()
+    if not os.path.exists(name):
+        return done
+    with open(name, 'r') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) != len(Result._fields) or fields[0] == Result._fields[0]:
+                continue
+            done.add((fields[0], int(fields[1]), fields[2]))
+    return done
+
+
+def solve(block, idx, inst, model_name, args):
+    cache = None
+    if args.cache is not None:
+        cache = ssplib.cache.GraphCache(args.cache, max_bytes=int(args.cache_size * 2 ** 20))
+    stats = ssplib.stats.Stats(memory=args.memory) if args.stats is not None else None
+    t0 = time.time()
+    m = models[model_name].build(
+        inst, patterns='heuristic' if args.start else None, relaxed=args.relax, backend=args.backend,
+        reduce=args.reduce, cache=cache, stats=stats,
+    )
+    m.setParam('OutputFlag', 0)
+    m.setParam('Threads', args.threads)
+    if args.time_limit is not None:
+        m.setParam('TimeLimit', args.time_limit)
+    m.update()
+    t1 = time.time()
+    dt_model, t0 = t1 - t0, t1
+    ssplib.stats.optimize(m, stats)
+    t1 = time.time()
+    dt_solve = t1 - t0
+    if m.status == ssplib.backend.INTERRUPTED:
+        raise KeyboardInterrupt()
+    result = Result(block, idx, model_name, m.status, m.objVal, m.numVars, m.numConstrs, m.numNZs, dt_model, dt_solve)
+    if stats is None:
+        return result, None
+    if m.status == ssplib.backend.OPTIMAL and not args.relax:
+        models[model_name].extract_solution(inst, m, stats=stats)
+    return result, dict(result._asdict(), **stats.to_dict())
+
 
 def main():
     p = argparse.ArgumentParser(description='Solve all SSP instances')
     p.add_argument('files', help='instance dat files', nargs='+')
-    p.add_argument('--model', '-m', choices=['arcflow', 'larcflow', 'reflect'])
-    p.add_argument('--out', '-o', help='output log file', type=argparse.FileType('w'))
+    p.add_argument('--model', '-m', choices=list(models), nargs='+', default=list(models))
+    p.add_argument('--out', '-o', help='output log file (results already in it are skipped)', required=True)
     p.add_argument('--relax', '-r', help='solve relaxation only', action='store_true')
+    p.add_argument('--backend', '-b', choices=['gurobi', 'highs'], default='gurobi')
+    p.add_argument('--reduce', help='reduce arc graph before building the model', action='store_true')
+    p.add_argument('--start', help='start from the best heuristic solution', action='store_true')
+    p.add_argument('--workers', '-j', help='number of parallel solves (default: cores / threads)', type=int)
+    p.add_argument('--threads', '-t', help='threads per solve', type=int, default=1)
+    p.add_argument('--time-limit', help='time limit per solve in seconds', type=float)
+    p.add_argument('--cache', help='directory to cache generated arc graphs in')
+    p.add_argument('--cache-size', help='maximal size of the graph cache in MB', type=float, default=4096)
+    p.add_argument('--stats', help='JSON lines file for per phase timings, sizes and solver trajectories')
+    p.add_argument('--memory', help='trace peak memory per phase (slow)', action='store_true')
     args = p.parse_args()
+    if args.workers is None:
+        # one core per solver thread
+        args.workers = max(1, (os.cpu_count() or 1) // args.threads)
 
-    model = models[args.model]
-    print(f'using model {model.__name__}')
-    print(f'writing to {args.out.name}')
+    print(f'using models {", ".join(args.model)}')
+    print(f'writing to {args.out}')
     print(f'reading {len(args.files)} files')
 
-    for f in args.files:
-        print(f'file {f}')
-        block = os.path.basename(f)
-        for idx, inst in enumerate(ssplib.data.read(f)):
-            t0 = time.time()
-            m = model.build(inst)
-            m.update()
-            if args.relax:
-                m = m.relax()
-            t1 = time.time()
-            dt_model, t0 = t1 - t0, t1
-            m.optimize()
-            t1 = time.time()
-            dt_solve = t1 - t0
-            if m.status == gp.GRB.INTERRUPTED:
-                raise KeyboardInterrupt()
-            args.out.write(f'{block}\t{idx}\t{m.objVal}\t{m.numVars}\t{m.numConstrs}\t{m.numNZs}\t{dt_model}\t{dt_solve}\n')
+    done = read_done(args.out)
+    print(f'skipping {len(done)} results already recorded')
+    is_new = not os.path.exists(args.out) or os.path.getsize(args.out) == 0
+    stats_file = open(args.stats, 'a') if args.stats is not None else contextlib.nullcontext()
+    with open(args.out, 'a') as out, stats_file as stats_out, concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        if is_new:
+            out.write('\t'.join(Result._fields) + '\n')
+        futures = []
+        for f in args.files:
+            block = os.path.basename(f)
+            for idx, inst in enumerate(ssplib.data.read(f)):
+                for model_name in args.model:
+                    if (block, idx, model_name) not in done:
+                        futures.append(pool.submit(solve, block, idx, inst, model_name, args))
+        print(f'solving {len(futures)} instances')
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                result, record = future.result()
+                out.write('\t'.join(map(str, result)) + '\n')
+                out.flush()
+                if stats_out is not None:
+                    stats_out.write(json.dumps(record) + '\n')
+                    stats_out.flush()
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
 
 
 if __name__ == '__main__':
@@ -0,0 +1,57 @@
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY = ['numpy', 'scipy', 'gurobipy', 'highspy']
+
+# scripts run in a fresh interpreter each, timing everything after startup
+SCENARIOS = dict(
+    ssplib='import ssplib',
+    read='import ssplib\ninsts = list(ssplib.data.read(NAME))',
+    heuristic=(
+        'import ssplib\ninsts = list(ssplib.data.read(NAME))\n'
+        'for inst in insts:\n'
+        '    ssplib.heuristics.upper_bound_b(inst), ssplib.heuristics.heuristic_a(inst), ssplib.heuristics.heuristic_c(inst)'
+    ),
+    build=(
+        'import ssplib\ninsts = list(ssplib.data.read(NAME))\n'
+        'ssplib.arcflow.build(insts[0], relaxed=True, backend=BACKEND).update()'
+    ),
+)
+
+RUNNER = '''
+import json, sys, time
+NAME, BACKEND = sys.argv[1], sys.argv[2]
+t0 = time.perf_counter()
+exec(compile(sys.argv[3], 'scenario', 'exec'))
+dt = time.perf_counter() - t0
+print(json.dumps(dict(dt=dt, loaded=[m for m in json.loads(sys.argv[4]) if m in sys.modules])))
+'''
+
+
+def run(code, args):
+    out = subprocess.run(
+        [sys.executable, '-c', RUNNER, args.data, args.backend, code, json.dumps(HEAVY)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out)
+
+
+def main():
+    p = argparse.ArgumentParser(description='Time imports and first steps in fresh interpreters')
+    p.add_argument('data', help='dataset file (e.g. from ssp-data)')
+    p.add_argument('--scenario', '-s', choices=list(SCENARIOS), nargs='+', default=list(SCENARIOS))
+    p.add_argument('--backend', '-b', choices=['gurobi', 'highs'], default='highs')
+    p.add_argument('--repeat', help='runs per scenario (the fastest one counts)', type=int, default=5)
+    args = p.parse_args()
+
+    print('\t'.join(['scenario', 'dt', 'loaded']))
+    for name in args.scenario:
+        results = [run(SCENARIOS[name], args) for _ in range(args.repeat)]
+        best = min(results, key=lambda r: r['dt'])
+        print('\t'.join([name, f'{best["dt"]:.4f}', ','.join(best['loaded']) or '-']), flush=True)
+
+
+if __name__ == '__main__':
+    main()
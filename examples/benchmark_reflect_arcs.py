@@ -0,0 +1,48 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import ssplib
+
+
+def traced(func, inst):
+    # result, run time and memory held by the result (traced allocations left
+    # after the call)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func(inst)
+    dt = time.perf_counter() - t0
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, dt, used
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description='Compare the reflect arc arrays to the arcs as tuples (the set-based reference is in tests)',
+    )
+    p.add_argument('--threshold', '-T', type=int, nargs='+', default=[1000, 5000, 20000])
+    p.add_argument('--items', '-n', help='number of item types', type=int, default=10)
+    p.add_argument('--demand', '-d', help='multiplicity of every item type', type=int, default=200)
+    p.add_argument('--seed', type=int, default=0)
+    args = p.parse_args()
+
+    np.random.seed(args.seed)
+    print('\t'.join(['threshold', 'nb_arcs', 'dt_arrays', 'dt_tuples', 'mb_arrays', 'mb_tuples', 'same']))
+    for threshold in args.threshold:
+        lvec = sorted(set(np.random.randint(1, max(2, threshold // 20), size=args.items).tolist()), reverse=True)
+        inst = threshold, lvec, [args.demand] * len(lvec)
+
+        (nodes, rpoint, arcs), dt_arrays, mb_arrays = traced(ssplib.reflect.arc_arrays, inst)
+        (ref_nodes, ref_rpoint, ref_arcs), dt_tuples, mb_tuples = traced(ssplib.reflect.create_reflect_arcs, inst)
+
+        same = nodes.tolist() == ref_nodes and rpoint == ref_rpoint and ssplib.graph.to_tuples(arcs) == ref_arcs
+        print('\t'.join(map(str, [
+            threshold, len(arcs), f'{dt_arrays:.3f}', f'{dt_tuples:.3f}',
+            f'{mb_arrays / 2 ** 20:.1f}', f'{mb_tuples / 2 ** 20:.1f}', same,
+        ])))
+
+
+if __name__ == '__main__':
+    main()
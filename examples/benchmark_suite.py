@@ -0,0 +1,172 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import ssplib
+models = ssplib.incremental.MODELS
+
+# metrics compared with the baseline: sizes may not grow at all (unless a size
+# tolerance is given), times and memory may grow by the tolerance (and by more
+# than the given absolute slack, to ignore noise on tiny cases)
+SIZES = ['nodes', 'arcs', 'nb_nzs']
+TIMES = ['dt_build', 'dt_solve']
+MEMORY = ['peak_mb']
+
+
+def git(*args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(ssplib.__file__)))
+    try:
+        return subprocess.run(['git', *args], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cases(args):
+    # (name, instance) of the synthetic ladder and of the given dataset files
+    for threshold in args.thresholds:
+        for nb_items in args.items:
+            for seed in range(args.seeds):
+                np.random.seed(seed)
+                inst = ssplib.generate.random(threshold, max(1, threshold // 20), max(2, threshold * 3 // 5), nb_items)
+                inst = int(inst[0]), [int(li) for li in inst[1]], [int(bi) for bi in inst[2]]
+                yield f'random-T{threshold}-n{nb_items}-s{seed}', inst
+    for name in args.data:
+        for idx, inst in enumerate(ssplib.data.read(name)):
+            if idx >= args.per_file:
+                break
+            yield f'{os.path.basename(name)}:{idx}', inst
+
+
+def measure(name, inst, model_name, args):
+    module = models[model_name]
+    # build time (best of repeat builds) and sizes
+    dt_build = np.inf
+    for _ in range(args.repeat):
+        stats = ssplib.stats.Stats()
+        t0 = time.perf_counter()
+        m = module.build(inst, relaxed=args.relax, backend=args.backend, stats=stats)
+        m.update()
+        dt_build = min(dt_build, time.perf_counter() - t0)
+
+    m.setParam('OutputFlag', 0)
+    m.setParam('Threads', 1)
+    if args.time_limit is not None:
+        m.setParam('TimeLimit', args.time_limit)
+    t0 = time.perf_counter()
+    m.optimize()
+    dt_solve = time.perf_counter() - t0
+    record = dict(
+        case=name, model=model_name, threshold=inst[0], nb_items=len(inst[1]),
+        **{key: stats.sizes[key] for key in ['nodes', 'arcs', 'nb_vars', 'nb_constrs', 'nb_nzs']},
+        dt_build=dt_build, dt_solve=dt_solve, status=m.status,
+        obj=m.objVal if m.status == ssplib.backend.OPTIMAL else None,
+    )
+    del m
+
+    # peak traced memory of a separate build (tracing slows it down)
+    if args.memory:
+        stats = ssplib.stats.Stats(memory=True)
+        m = module.build(inst, relaxed=args.relax, backend=args.backend, stats=stats)
+        m.update()
+        record['peak_mb'] = max(phase['peak'] for phase in stats.phases.values()) / 2 ** 20
+    return record
+
+
+def load(name, results):
+    # baseline given as file name or as revision with stored results
+    if os.path.exists(name):
+        path = name
+    else:
+        commit = git('rev-parse', name)
+        assert commit is not None, f'unknown baseline {name}'
+        path = os.path.join(results, commit + '.json')
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare(current, baseline, args):
+    # regressions (case, model, metric, baseline value, current value)
+    base = {(r['case'], r['model']): r for r in baseline['results']}
+    flagged = []
+    for r in current['results']:
+        b = base.get((r['case'], r['model']))
+        if b is None:
+            continue
+        if r['obj'] is not None and b['obj'] is not None and abs(r['obj'] - b['obj']) > 1e-6 * max(1, abs(b['obj'])):
+            flagged.append((r['case'], r['model'], 'obj', b['obj'], r['obj']))
+        for metrics, tol, slack in [
+            (SIZES, args.size_tolerance, 0),
+            (TIMES, args.tolerance, args.time_slack),
+            (MEMORY, args.tolerance, args.memory_slack),
+        ]:
+            for key in metrics:
+                if key not in r or key not in b:
+                    continue
+                if r[key] > b[key] * (1 + tol) and r[key] - b[key] > slack:
+                    flagged.append((r['case'], r['model'], key, b[key], r[key]))
+    return flagged
+
+
+def main():
+    p = argparse.ArgumentParser(description='Benchmark the models on fixed instances and compare with a baseline')
+    p.add_argument('--model', '-m', choices=list(models), nargs='+', default=list(models))
+    p.add_argument('--thresholds', '-T', help='thresholds of the random instances', type=int, nargs='*', default=[100, 1000, 5000])
+    p.add_argument('--items', '-n', help='numbers of items of the random instances', type=int, nargs='*', default=[10, 30])
+    p.add_argument('--seeds', help='random instances per threshold and number of items', type=int, default=2)
+    p.add_argument('--data', help='dataset files (e.g. from ssp-data)', nargs='*', default=[])
+    p.add_argument('--per-file', help='instances per dataset file', type=int, default=10)
+    p.add_argument('--relax', '-r', help='solve relaxation only', action='store_true')
+    p.add_argument('--backend', '-b', choices=['gurobi', 'highs'], default='highs')
+    p.add_argument('--time-limit', help='time limit per solve in seconds', type=float, default=60)
+    p.add_argument('--repeat', help='builds per case (the fastest one counts)', type=int, default=3)
+    p.add_argument('--no-memory', help='do not trace the peak memory of the build', dest='memory', action='store_false')
+    p.add_argument('--results', help='directory of the results per commit', default='benchmarks')
+    p.add_argument('--baseline', help='results file or revision to compare with')
+    p.add_argument('--tolerance', help='relative slowdown/memory growth flagged as regression', type=float, default=0.25)
+    p.add_argument('--size-tolerance', help='relative growth of graph and model sizes flagged', type=float, default=0)
+    p.add_argument('--time-slack', help='ignore slowdowns below this many seconds', type=float, default=0.05)
+    p.add_argument('--memory-slack', help='ignore memory growth below this many MB', type=float, default=1)
+    args = p.parse_args()
+
+    # (loaded first, the results of the current commit may replace it)
+    baseline = load(args.baseline, args.results) if args.baseline is not None else None
+    commit = git('rev-parse', 'HEAD') or 'unknown'
+    dirty = bool(git('status', '--porcelain', '--untracked-files=no'))
+    current = dict(
+        commit=commit, dirty=dirty, date=datetime.datetime.now().isoformat(timespec='seconds'),
+        python=platform.python_version(), numpy=np.__version__, backend=args.backend, relax=args.relax,
+        results=[],
+    )
+    print('\t'.join(['case', 'model', 'arcs', 'nodes', 'nb_nzs', 'dt_build', 'dt_solve', 'peak_mb', 'obj']))
+    for name, inst in cases(args):
+        for model_name in args.model:
+            r = measure(name, inst, model_name, args)
+            current['results'].append(r)
+            print('\t'.join(map(str, [
+                name, model_name, r['arcs'], r['nodes'], r['nb_nzs'], f'{r["dt_build"]:.3f}', f'{r["dt_solve"]:.3f}',
+                f'{r.get("peak_mb", np.nan):.1f}', r['obj'],
+            ])), flush=True)
+
+    os.makedirs(args.results, exist_ok=True)
+    out = os.path.join(args.results, commit + ('-dirty' if dirty else '') + '.json')
+    with open(out, 'w') as f:
+        json.dump(current, f, indent=1)
+    print(f'results written to {out}')
+
+    if baseline is not None:
+        flagged = compare(current, baseline, args)
+        print(f'compared with {baseline["commit"][:10]}: {len(flagged)} regressions')
+        for case, model_name, key, old, new in flagged:
+            print(f'  {case} {model_name} {key}: {old:.6g} -> {new:.6g}')
+        if len(flagged) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
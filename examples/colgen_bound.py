@@ -0,0 +1,43 @@
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import ssplib
+
+
+def measure(fun):
+    tracemalloc.start()
+    t0 = time.time()
+    result = fun()
+    dt = time.time() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, dt, peak / 2 ** 20
+
+
+def arcflow_bound(inst, backend):
+    model = ssplib.arcflow.build(inst, relaxed=True, backend=backend)
+    model.setParam('OutputFlag', 0)
+    model.optimize()
+    return model.objVal
+
+
+def main():
+    p = argparse.ArgumentParser(description='Compare column generation and arcflow LP bounds')
+    p.add_argument('--threshold', '-T', type=int, default=1000)
+    p.add_argument('--items', '-n', type=int, default=100)
+    p.add_argument('--backend', '-b', choices=['gurobi', 'highs'], default='highs')
+    p.add_argument('--seed', type=int, default=42)
+    args = p.parse_args()
+
+    np.random.seed(args.seed)
+    inst = ssplib.generate.random(args.threshold, args.threshold // 20, args.threshold * 3 // 5, args.items)
+
+    (bound, solution), dt, mem = measure(lambda: ssplib.colgen.solve(inst))
+    print(f'colgen:  bound = {bound:.6f} ({len(solution)} patterns), time = {dt:.2f}s, peak Python memory = {mem:.1f}MB')
+    bound, dt, mem = measure(lambda: arcflow_bound(inst, args.backend))
+    print(f'arcflow: bound = {bound:.6f}, time = {dt:.2f}s, peak Python memory = {mem:.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
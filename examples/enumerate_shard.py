@@ -0,0 +1,58 @@
+import argparse
+import os
+
+import ssplib
+models = dict(
+    arcflow=ssplib.arcflow,
+    larcflow=ssplib.larcflow,
+    reflect=ssplib.reflect,
+    mitm=ssplib.mitm,
+)
+
+
+def last_index(name):
+    # index of the last instance written to the output (or None)
+    if not os.path.exists(name):
+        return None
+    last = None
+    with open(name, 'r') as f:
+        for line in f:
+            fields = line.split('\t')
+            if fields[0].isdigit():
+                last = int(fields[0])
+    return last
+
+
+def main():
+    p = argparse.ArgumentParser(description='Solve one shard of all instances for a threshold')
+    p.add_argument('threshold', type=int)
+    p.add_argument('items', help='maximal number of items', type=int)
+    p.add_argument('--exact', help='exactly the given number of items', action='store_true')
+    p.add_argument('--shard', help='shard number and number of shards', type=int, nargs=2, default=[0, 1])
+    p.add_argument('--model', '-m', choices=list(models), default='arcflow')
+    p.add_argument('--relax', '-r', help='solve relaxation only', action='store_true')
+    p.add_argument('--backend', '-b', choices=['gurobi', 'highs'], default='gurobi')
+    p.add_argument('--canonical', help='skip instances equivalent to ones with smaller threshold', action='store_true')
+    p.add_argument('--out', '-o', help='output log file (a run is resumed after its last instance)', required=True)
+    args = p.parse_args()
+
+    lo, hi = ssplib.generate.shard_range(args.threshold, args.items, *args.shard, exact_n=args.exact)
+    last = last_index(args.out)
+    start = lo if last is None else last + 1
+    print(f'solving instances {start} to {hi - 1} of shard {args.shard[0]} / {args.shard[1]}')
+
+    with open(args.out, 'a') as out:
+        for idx, inst in ssplib.generate.ranked(
+            args.threshold, args.items, args.exact, start, hi, canonical=args.canonical,
+        ):
+            if len(inst[1]) == 0:
+                continue
+            m = models[args.model].build(inst, relaxed=args.relax, backend=args.backend)
+            m.setParam('OutputFlag', 0)
+            m.optimize()
+            out.write('\t'.join(map(str, [idx, ssplib.data.format_instance(inst), m.status, m.objVal])) + '\n')
+            out.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -27,13 +27,20 @@ def main():
         print_solution(model.objVal, solution)
 
         # solve LP relaxation
-        model = model.relax()
+        model = ssplib.backend.relax(model)
         model.optimize()
 
         print('-- solution of lp relaxation --')
         solution = mod.extract_solution(inst, model)
         print_solution(model.objVal, solution)
 
+        # round the lp solution to an integer one
+        print('-- rounded lp solution --')
+        patterns = ssplib.heuristics.lp_rounding(inst, solution)
+        print(f'value = {len(patterns)}')
+        for pattern in patterns:
+            ssplib.heuristics.print_solution(inst, pattern)
+
 
 if __name__ == '__main__':
     main()
@@ -1,7 +1,24 @@
-from . import arcflow
-from . import larcflow
-from . import reflect
+import importlib
 
-from . import data
-from . import generate
-from . import heuristics
+# submodules (and with them numpy, scipy and the solvers) are imported on first
+# access, e.g. ssplib.data or ssplib.heuristics do not load any solver
+_SUBMODULES = [
+    'arcflow', 'larcflow', 'reflect', 'mitm',
+    'backend', 'cache', 'colgen', 'data', 'decompose', 'estimate', 'generate', 'graph', 'heuristics',
+    'incremental', 'pipeline', 'reduction', 'stats',
+]
+_ATTRIBUTES = dict(solve='pipeline', solve_many='pipeline')
+
+__all__ = _SUBMODULES + list(_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module('.' + name, __name__)
+    if name in _ATTRIBUTES:
+        return getattr(importlib.import_module('.' + _ATTRIBUTES[name], __name__), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
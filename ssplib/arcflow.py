@@ -1,24 +1,34 @@
-import gurobipy as gp
-from sortedcontainers import SortedSet
+import numpy as np
 import collections
 
-def create_arcflow_arcs(inst):
+from . import backend as _backend
+from . import cache as _cache
+from . import decompose
+from . import graph
+from . import heuristics
+from . import reduction
+from . import stats as _stats
+
+
+def arc_arrays(inst):
     threshold, lvec, bvec = inst
     m = len(lvec)
-    is_active = SortedSet([0])
-    arcs = set()
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    parts = []
     for item in range(m):
-        for node in list(reversed(is_active)):
-            if node == threshold:
-                continue
-            for rep in range(bvec[item]):
-                start = node + rep * lvec[item]
-                if start >= threshold:
-                    break
-                end = min(threshold, start + lvec[item])
-                arcs.add((start, end, item))
-                is_active.add(end)
-    return is_active, arcs
+        # all starts reachable by repeating item from the nodes active so far
+        starts = np.flatnonzero(graph.shift_union(is_active[:threshold], lvec[item], bvec[item]))
+        ends = np.minimum(threshold, starts + lvec[item])
+        parts.append(graph.make_arcs(starts, ends, item))
+        is_active[ends] = True
+    return np.flatnonzero(is_active), graph.concat(parts)
+
+
+def create_arcflow_arcs(inst):
+    # compatibility wrapper: sorted list of nodes and set of arc tuples
+    nodes, arcs = arc_arrays(inst)
+    return nodes.tolist(), graph.to_tuples(arcs, kind=False)
 
 
 def create_variable_start(inst, patterns):
@@ -26,7 +36,7 @@ def create_variable_start(inst, patterns):
     vals = collections.Counter()
     for pattern in patterns:
         start = 0
-        for item, count in pattern.items():
+        for item, count in sorted(pattern.items()):
             for _ in range(count):
                 end = min(threshold, start + lvec[item])
                 vals[(start, end, item)] += 1
@@ -34,69 +44,73 @@ def create_variable_start(inst, patterns):
     return vals
 
 
-def build(inst, patterns=None, bound=None, relaxed=False):
+def create_graph(inst, reduce=False):
+    threshold, lvec, bvec = inst
+    nodes, arcs = arc_arrays(inst)
+    info = None
+    if reduce:
+        inner = nodes[(nodes != 0) & (nodes != threshold)]
+        nodes, arcs, info = reduction.reduce_graph(nodes, arcs, inner, 1, -1)
+    return dict(nodes=nodes, arcs=arcs), dict(reduction=info)
+
+
+def build(inst, patterns=None, bound=None, relaxed=False, backend='gurobi', reduce=False, cache=None, stats=None):
     threshold, lvec, bvec = inst
     m = len(lvec)
     assert m == len(bvec)
-    is_active, arcs = create_arcflow_arcs(inst)
-    arcs = gp.tuplelist(arcs)
+    with _stats.phase(stats, 'graph'):
+        arrays, meta = _cache.fetch(cache, inst, 'arcflow', lambda: create_graph(inst, reduce), reduce=reduce)
+    nodes, arcs, info = arrays['nodes'], arrays['arcs'], meta['reduction']
+    inner = nodes[(nodes != 0) & (nodes != threshold)]
+    _stats.record(stats, nodes=len(nodes), arcs=len(arcs), reduction=info)
 
-    model = gp.Model()
-    x = model.addVars(arcs, name='x', vtype=gp.GRB.CONTINUOUS if relaxed else gp.GRB.INTEGER, ub=[
-        gp.GRB.INFINITY if arc[2] == -1 else bvec[arc[2]] for arc in arcs
-    ])
+    with _stats.phase(stats, 'matrices'):
+        problem = _backend.Problem(arcs, ub=graph.upper_bounds(arcs, bvec), integer=not relaxed, kind=False)
 
-    # set start values
-    if patterns is not None:
-        for arc, count in create_variable_start(inst, patterns).items():
-            x[arc].start = count
+        # flow conservation in all inner nodes
+        problem.add_constrs(graph.incidence(inner, arcs), '=', np.zeros(len(inner)))
 
-    for j in is_active:
-        if j == 0 or j == threshold:
-            continue
-        model.addConstr(x.sum(j, '*', '*') == x.sum('*', j, '*'))
+        problem.add_constrs(graph.item_matrix(arcs, m), '<', bvec, name='items')
 
-    for i in range(m):
-        model.addConstr(x.sum('*', '*', i) <= bvec[i])
+        obj = (arcs['start'] == 0).astype(float)
+        problem.set_objective(obj)
 
-    obj = x.sum(0, '*', '*')
-    model.setObjective(obj, sense=gp.GRB.MAXIMIZE)
+        if bound is not None:
+            problem.add_constr(obj, '<', bound, name='bound')
 
-    if bound is not None:
-        model.addConstr(obj <= bound)
+    # set start values (patterns='heuristic' for the best heuristic solution)
+    if patterns is not None:
+        with _stats.phase(stats, 'start'):
+            patterns = heuristics.start_patterns(inst, patterns)
+            problem.set_start(create_variable_start(inst, patterns))
+    model = _backend.create(problem, backend, stats)
+    model._reduction = info
     return model
 
-def _name2tuple(name):
-    i, j, k = name[2:-1].split(',')
-    return int(i), int(j), int(k)
 
+@_stats.timed('extract')
 def extract_solution(inst, model, eps=1e-6):
     threshold, lvec, bvec = inst
 
-    vals = gp.tupledict([
-        (_name2tuple(v.varName), v.x)
-        for v in model.getVars()
-        if v.x > eps
-    ])
-    arcs = vals.keys()
+    index = decompose.flow_index(model, eps)
+    vals = index.vals
 
     solutions = []
-    for arc0 in arcs.select(0, '*', '*'):
+    for arc0 in index.out_arcs(0):
         while vals[arc0] > eps:
             minval = vals[arc0]
-            start, next_start, item = arc0
+            next_start = index.end[arc0]
             current_path = [arc0]
             while next_start < threshold:
-                next_arcs = [arc for arc in arcs.select(next_start, '*', '*') if vals[arc] > eps]
-                assert len(next_arcs) > 0
-                arc1 = start, end, item = next_arcs[0]
+                arc1 = index.next_arc(next_start)
+                assert arc1 is not None
                 minval = min(minval, vals[arc1])
                 current_path.append(arc1)
-                next_start = end
+                next_start = index.end[arc1]
             solution = []
             for arc in current_path:
                 vals[arc] -= minval
-                solution.append(arc[2])
+                solution.append(index.item[arc])
             solutions.append((minval, solution))
 
     return [(v, sum([lvec[k] for k in sol]), [lvec[k] for k in sol]) for v, sol in solutions]
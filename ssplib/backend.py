@@ -0,0 +1,313 @@
+import numpy as np
+import time
+import warnings
+
+from . import graph
+from . import stats as _stats
+
+# gurobipy environment used for all models (None for the default environment)
+ENV = None
+
+# status codes (same values as GRB.Status)
+OPTIMAL = 2
+INFEASIBLE = 3
+UNBOUNDED = 5
+TIME_LIMIT = 9
+INTERRUPTED = 11
+
+
+class Problem:
+    # solver independent description of an arcflow model with one variable per arc
+    # (arcs may be None for models without an underlying graph)
+    def __init__(self, arcs, lb=None, ub=None, integer=True, kind=True):
+        n = len(arcs) if arcs is not None else len(ub)
+        self.arcs = arcs
+        self.kind = kind
+        self.lb = np.zeros(n) if lb is None else np.asarray(lb, dtype=float)
+        self.ub = np.full(n, np.inf) if ub is None else np.asarray(ub, dtype=float)
+        self.integer = integer
+        self.obj = np.zeros(n)
+        self.maximize = True
+        self.start = None
+        self.constrs = []
+        # position of named constraint blocks in constrs
+        self.blocks = {}
+
+    def add_constrs(self, mat, sense, rhs, name=None):
+        import scipy.sparse as sp
+        if name is not None:
+            self.blocks[name] = len(self.constrs)
+        self.constrs.append((sp.csr_matrix(mat), sense, np.asarray(rhs, dtype=float)))
+
+    def add_constr(self, coeffs, sense, rhs, name=None):
+        self.add_constrs(np.asarray(coeffs, dtype=float)[None, :], sense, [rhs], name)
+
+    def set_objective(self, coeffs, maximize=True):
+        self.obj = np.asarray(coeffs, dtype=float)
+        self.maximize = maximize
+
+    def set_start(self, vals):
+        # vals maps arcs (start, end, item[, kind name]) to start values (all
+        # other arcs start at zero); the start is only kept if it is feasible for
+        # all constraints added so far (arcs may e.g. be missing from a reduced graph)
+        self.start = np.zeros(len(self.obj))
+        pos = graph.find_arcs(self.arcs, graph.from_keys(vals.keys(), kind=self.kind))
+        self.start[pos] = list(vals.values())
+        if (pos < 0).any():
+            self.start[:] = np.nan
+        if not self.check_start():
+            warnings.warn('start values are not feasible and ignored')
+            self.start = None
+            return False
+        return True
+
+    def check_start(self, tol=1e-6):
+        # whether the start values satisfy all bounds and constraints
+        x = self.start
+        if x is None or np.isnan(x).any():
+            return False
+        if (x < self.lb - tol).any() or (x > self.ub + tol).any():
+            return False
+        mat, lo, hi = self.matrix()
+        ax = mat @ x
+        return bool(((ax >= lo - tol) & (ax <= hi + tol)).all())
+
+    def matrix(self):
+        # stacked constraint matrix with row bounds lo <= A x <= hi
+        import scipy.sparse as sp
+        mats, lo, hi = [], [], []
+        for mat, sense, rhs in self.constrs:
+            mats.append(mat)
+            lo.append(rhs if sense in '=>' else np.full(len(rhs), -np.inf))
+            hi.append(rhs if sense in '=<' else np.full(len(rhs), np.inf))
+        if len(mats) == 0:
+            return sp.csr_matrix((0, len(self.obj))), np.zeros(0), np.zeros(0)
+        return sp.vstack(mats, format='csr'), np.concatenate(lo), np.concatenate(hi)
+
+
+def create(problem, backend='gurobi', stats=None):
+    _stats.record(
+        stats, nb_vars=len(problem.obj), nb_constrs=sum(mat.shape[0] for mat, _, _ in problem.constrs),
+        nb_nzs=sum(mat.nnz for mat, _, _ in problem.constrs),
+    )
+    if backend == 'gurobi':
+        return to_gurobi(problem, stats)
+    if backend == 'highs':
+        return HighsModel(problem)
+    raise ValueError('unknown backend {}'.format(backend))
+
+
+def init_env(**params):
+    # start a gurobipy environment with the given parameters shared by all
+    # models created afterwards (saves the license check per model)
+    global ENV
+    import gurobipy as gp
+    ENV = gp.Env(empty=True)
+    for name, value in params.items():
+        ENV.setParam(name, value)
+    ENV.start()
+    return ENV
+
+
+def to_gurobi(problem, stats=None):
+    import gurobipy as gp
+    arcs = problem.arcs
+    model = gp.Model() if ENV is None else gp.Model(env=ENV)
+    with _stats.phase(stats, 'variables'):
+        x = model.addMVar(
+            len(problem.obj), name='x',
+            vtype=gp.GRB.INTEGER if problem.integer else gp.GRB.CONTINUOUS,
+            lb=problem.lb, ub=problem.ub,
+        )
+        if problem.start is not None:
+            x.Start = np.where(np.isnan(problem.start), gp.GRB.UNDEFINED, problem.start)
+    with _stats.phase(stats, 'constraints'):
+        constrs = [model.addMConstr(mat, x, sense, rhs) for mat, sense, rhs in problem.constrs]
+        model.setObjective(problem.obj @ x, sense=gp.GRB.MAXIMIZE if problem.maximize else gp.GRB.MINIMIZE)
+        model.update()
+    model._arcs = arcs
+    model._x = x
+    model._blocks = {name: constrs[i] for name, i in problem.blocks.items()}
+    return model
+
+
+class HighsModel:
+    # minimal model object mimicking the parts of gurobipy.Model used in ssplib
+    def __init__(self, problem):
+        self._problem = problem
+        self._arcs = problem.arcs
+        self.params = dict(OutputFlag=True, TimeLimit=np.inf, MIPGap=1e-4)
+        self.status = None
+        self.objVal = np.nan
+        self.X = None
+        self.RC = None
+        self.Runtime = 0.0
+
+    @property
+    def numVars(self):
+        return len(self._problem.obj)
+
+    @property
+    def numConstrs(self):
+        return sum(mat.shape[0] for mat, _, _ in self._problem.constrs)
+
+    @property
+    def numNZs(self):
+        return sum(mat.nnz for mat, _, _ in self._problem.constrs)
+
+    @property
+    def IsMIP(self):
+        return int(self._problem.integer)
+
+    @property
+    def ObjBound(self):
+        return self.objVal
+
+    def setParam(self, name, value):
+        self.params[name] = value
+
+    def update(self):
+        pass
+
+    def relax(self):
+        problem = self._problem
+        relaxed = Problem(problem.arcs, problem.lb.copy(), problem.ub.copy(), integer=False, kind=problem.kind)
+        relaxed.obj, relaxed.maximize = problem.obj.copy(), problem.maximize
+        # (own constraint list, so set_rhs on the copy leaves the original alone)
+        relaxed.constrs = [(mat, sense, rhs.copy()) for mat, sense, rhs in problem.constrs]
+        relaxed.blocks = dict(problem.blocks)
+        model = HighsModel(relaxed)
+        model.params = dict(self.params)
+        return model
+
+    def optimize(self):
+        from scipy import optimize
+        problem = self._problem
+        sign = -1.0 if problem.maximize else 1.0
+        mat, lo, hi = problem.matrix()
+        options = dict(disp=bool(self.params['OutputFlag']))
+        if np.isfinite(self.params['TimeLimit']):
+            options['time_limit'] = self.params['TimeLimit']
+        t0 = time.time()
+        if len(problem.obj) == 0:
+            # scipy rejects empty models (all rows are 0 <= hi or lo <= 0)
+            self.Runtime = time.time() - t0
+            self.status = OPTIMAL if ((lo <= 0) & (hi >= 0)).all() else INFEASIBLE
+            self.X, self.objVal = np.zeros(0), 0.0
+            if not problem.integer:
+                self.RC = np.zeros(0)
+            return
+        if problem.integer:
+            options['mip_rel_gap'] = self.params['MIPGap']
+            res = optimize.milp(
+                sign * problem.obj, integrality=np.ones(len(problem.obj)),
+                bounds=optimize.Bounds(problem.lb, problem.ub),
+                constraints=[optimize.LinearConstraint(mat, lo, hi)] if mat.shape[0] > 0 else [],
+                options=options,
+            )
+        else:
+            res = self._linprog(sign, mat, lo, hi, options)
+        self.Runtime = time.time() - t0
+        self.status = {0: OPTIMAL, 1: TIME_LIMIT, 2: INFEASIBLE, 3: UNBOUNDED}.get(res.status, INTERRUPTED)
+        if res.x is not None:
+            self.X = res.x
+            self.objVal = problem.obj @ res.x
+
+    def _linprog(self, sign, mat, lo, hi, options):
+        import scipy.sparse as sp
+        from scipy import optimize
+        problem = self._problem
+        is_eq = lo == hi
+        is_lo = ~is_eq & np.isfinite(lo)
+        is_hi = ~is_eq & np.isfinite(hi)
+        a_ub = sp.vstack([mat[is_hi], -mat[is_lo]], format='csr')
+        b_ub = np.concatenate([hi[is_hi], -lo[is_lo]])
+        res = optimize.linprog(
+            sign * problem.obj,
+            A_ub=a_ub if a_ub.shape[0] > 0 else None, b_ub=b_ub if a_ub.shape[0] > 0 else None,
+            A_eq=mat[is_eq] if is_eq.any() else None, b_eq=lo[is_eq] if is_eq.any() else None,
+            bounds=np.column_stack([problem.lb, problem.ub]),
+            method='highs', options=options,
+        )
+        if res.x is not None:
+            # reduced costs in the sense of the original objective
+            self.RC = sign * (res.lower.marginals + res.upper.marginals)
+        return res
+
+
+def set_rhs(model, name, rhs):
+    # change the right-hand side of a named constraint block
+    if isinstance(model, HighsModel):
+        problem = model._problem
+        i = problem.blocks[name]
+        mat, sense, _ = problem.constrs[i]
+        problem.constrs[i] = (mat, sense, np.asarray(rhs, dtype=float))
+    else:
+        model._blocks[name].RHS = np.asarray(rhs, dtype=float)
+
+
+def set_bounds(model, lb=None, ub=None):
+    if isinstance(model, HighsModel):
+        if lb is not None:
+            model._problem.lb = np.asarray(lb, dtype=float)
+        if ub is not None:
+            model._problem.ub = np.asarray(ub, dtype=float)
+    else:
+        if lb is not None:
+            model._x.LB = lb
+        if ub is not None:
+            model._x.UB = ub
+
+
+def fix_to_zero(model, mask):
+    # set the upper bounds of the variables selected by mask to zero
+    if isinstance(model, HighsModel):
+        model._problem.ub = np.where(mask, 0.0, model._problem.ub)
+    else:
+        model._x.UB = np.where(mask, 0.0, model._x.UB)
+
+
+def set_start(model, start):
+    if isinstance(model, HighsModel):
+        # scipy does not take MIP starts
+        model._problem.start = np.asarray(start, dtype=float)
+    else:
+        model._x.Start = start
+
+
+def relax(model, stats=None):
+    # relaxed copy of a model which keeps the arc data needed for extraction
+    with _stats.phase(stats, 'relax'):
+        relaxed = model.relax()
+    relaxed._arcs = model._arcs
+    return relaxed
+
+
+def values(model):
+    if isinstance(model, HighsModel):
+        return np.asarray(model.X)
+    x = getattr(model, '_x', None)
+    if x is not None:
+        return x.X
+    return np.array(model.getAttr('X', model.getVars()))
+
+
+def reduced_costs(model):
+    # reduced costs of all variables of a solved LP
+    if isinstance(model, HighsModel):
+        return np.asarray(model.RC)
+    x = getattr(model, '_x', None)
+    if x is not None:
+        return x.RC
+    return np.array(model.getAttr('RC', model.getVars()))
+
+
+def solution_arrays(model):
+    # arcs and values of all variables of a solved model
+    arcs = getattr(model, '_arcs', None)
+    if arcs is None:
+        raise ValueError(
+            'model has no arc data; copies made by gurobipy (e.g. model.relax()) do not keep it, '
+            'use ssplib.backend.relax(model) instead'
+        )
+    return arcs, values(model)
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from . import graph
+
+
+class GraphCache:
+    # content-addressed directory of generated arc graphs; every entry is a
+    # directory with one .npy file per array (loaded memory-mapped) and a json
+    # file with scalar data, least recently used entries are evicted once the
+    # total size exceeds max_bytes
+    def __init__(self, path, max_bytes=2 ** 30):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def key(inst, kind, **options):
+        threshold, lvec, bvec = inst
+        data = [
+            int(threshold), [int(li) for li in lvec], [int(bi) for bi in bvec], kind, sorted(options.items()),
+            str(graph.ARC_DTYPE.descr),
+        ]
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+    def load(self, key):
+        entry = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+            arrays = {
+                name: np.load(os.path.join(entry, name + '.npy'), mmap_mode='r')
+                for name in meta.pop('_arrays')
+            }
+        except FileNotFoundError:
+            return None
+        # mark as recently used
+        os.utime(entry)
+        return arrays, meta
+
+    def store(self, key, arrays, meta):
+        entry = os.path.join(self.path, key)
+        if os.path.exists(entry):
+            return
+        tmp = tempfile.mkdtemp(dir=self.path, prefix='.tmp-')
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, name + '.npy'), arr)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(dict(meta, _arrays=list(arrays)), f)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # stored concurrently by another process
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for e in os.scandir(self.path):
+            if e.is_dir() and not e.name.startswith('.'):
+                size = sum(f.stat().st_size for f in os.scandir(e.path))
+                entries.append((e.stat().st_mtime, size, e.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def fetch(self, inst, kind, create, **options):
+        # cached result of create() -> (arrays, meta) for the given instance
+        key = self.key(inst, kind, **options)
+        hit = self.load(key)
+        if hit is not None:
+            return hit
+        arrays, meta = create()
+        self.store(key, arrays, meta)
+        return arrays, meta
+
+
+def fetch(cache, inst, kind, create, **options):
+    if cache is None:
+        return create()
+    return cache.fetch(inst, kind, create, **options)
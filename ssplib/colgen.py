@@ -0,0 +1,114 @@
+import numpy as np
+
+from . import heuristics
+
+
+def _chunks(bvec):
+    # binary splitting of bounded multiplicities into 0/1 items (item, count)
+    chunks = []
+    for k, bk in enumerate(bvec):
+        size = 1
+        while bk > 0:
+            take = min(size, bk)
+            chunks.append((k, take))
+            bk -= take
+            size *= 2
+    return chunks
+
+
+def _minimal(threshold, lvec, pattern):
+    # drop smallest items as long as the pattern stays feasible
+    length = sum(lvec[k] * c for k, c in pattern.items())
+    for k in sorted(pattern, key=lambda k: lvec[k]):
+        while pattern[k] > 0 and length - lvec[k] >= threshold:
+            pattern[k] -= 1
+            length -= lvec[k]
+    return {k: c for k, c in pattern.items() if c > 0}
+
+
+def price(threshold, lvec, bvec, duals, nb_patterns=1):
+    # cheapest patterns w.r.t. duals (as list of (pattern, cost) with dicts
+    # item -> count) with length >= threshold by a bounded knapsack DP over the
+    # lengths 0, ..., threshold (capped at threshold); besides the optimal one,
+    # the best pattern ending with each of the other binary chunks is a candidate
+    chunks = _chunks(bvec)
+    cost = np.full(threshold + 1, np.inf)
+    cost[0] = 0.0
+    taken = np.zeros((len(chunks), threshold + 1), dtype=bool)
+    cand_cost = np.full(len(chunks), np.inf)
+    cand_pred = np.zeros(len(chunks), dtype=np.int64)
+    for c, (k, count) in enumerate(chunks):
+        length = min(threshold, count * lvec[k])
+        weight = count * duals[k]
+        new = cost.copy()
+        new[length:threshold] = np.minimum(new[length:threshold], cost[:threshold - length] + weight)
+        # every state from threshold - length on reaches the capped state
+        low = threshold - length
+        j = low + int(np.argmin(cost[low:]))
+        cand_cost[c], cand_pred[c] = cost[j] + weight, j
+        new[threshold] = min(new[threshold], cand_cost[c])
+        taken[c] = new < cost
+        cost = new
+
+    patterns = []
+    for c in np.argsort(cand_cost, kind='stable')[:nb_patterns]:
+        if np.isinf(cand_cost[c]):
+            break
+        k, count = chunks[c]
+        pattern = {k: count}
+        pos = cand_pred[c]
+        for c1 in reversed(range(c)):
+            if not taken[c1, pos]:
+                continue
+            k, count = chunks[c1]
+            pattern[k] = pattern.get(k, 0) + count
+            pos = cand_pred[c1] if pos == threshold else pos - count * lvec[k]
+        pattern = _minimal(threshold, lvec, pattern)
+        if pattern not in [p for p, _ in patterns]:
+            patterns.append((pattern, sum(duals[k] * c for k, c in pattern.items())))
+    return sorted(patterns, key=lambda p: p[1])
+
+
+def _solve_master(columns, bvec):
+    from scipy import optimize
+    mat = np.array(columns, dtype=float).T
+    res = optimize.linprog(
+        -np.ones(len(columns)), A_ub=mat, b_ub=np.asarray(bvec, dtype=float),
+        bounds=(0, None), method='highs',
+    )
+    assert res.status == 0, res.message
+    return -res.fun, res.x, -res.ineqlin.marginals
+
+
+def solve(inst, eps=1e-9, nb_columns=20, tol=0, max_iter=100000):
+    # LP bound of the SSP by column generation over minimal patterns, adding up
+    # to nb_columns patterns per iteration; stops early once the Farley bound
+    # value / min reduced cost is within tol of the master value; returns the
+    # bound and the fractional solution in the format of extract_solution
+    threshold, lvec, bvec = inst
+    m = len(lvec)
+
+    # initial columns from a greedy heuristic
+    columns = []
+    for pattern in heuristics.heuristic_a(inst):
+        columns.append([pattern.get(k, 0) for k in range(m)])
+    if len(columns) == 0:
+        return 0.0, []
+
+    for _it in range(max_iter):
+        value, lam, duals = _solve_master(columns, bvec)
+        patterns = price(threshold, lvec, bvec, duals, nb_columns)
+        if len(patterns) == 0 or patterns[0][1] >= 1 - eps:
+            break
+        if patterns[0][1] > 0 and value / patterns[0][1] - value <= tol:
+            break
+        for pattern, reduced in patterns:
+            if reduced < 1 - eps:
+                columns.append([pattern.get(k, 0) for k in range(m)])
+
+    solution = []
+    for col, val in zip(columns, lam):
+        if val > eps:
+            items = [lvec[k] for k in range(m) for _ in range(col[k])]
+            solution.append((val, sum(items), items))
+    return value, solution
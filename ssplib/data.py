@@ -1,5 +1,15 @@
+import abc
+import array
 import collections
 
+# binary container: magic, number of instances and of items (int64), then the
+# arrays offsets (int64, into the item arrays, one more than instances) and
+# thresholds, lengths and multiplicities (int32); numpy is only imported for
+# binary files and the line index of text files
+MAGIC = b'SSPBIN1\0'
+DTYPES = ['<i8', '<i4', '<i4', '<i4']
+
+
 def strip_large_parts(inst):
     threshold, lvec, bvec = inst
     lvecn, bvecn = [], []
@@ -10,19 +20,165 @@ def strip_large_parts(inst):
     return threshold, lvecn, bvecn
 
 
-def read(name):
-    lines = open(name, 'r').read().split('\n')
-    nb_instances = int(lines[0])
+def parse(line):
+    line = list(map(int, line.split()))
+    nb_items = line[0]
+    threshold = line[1]
+    inst = threshold, line[2:2 + nb_items], line[2 + nb_items:2 + 2 * nb_items]
+    return strip_large_parts(inst)
+
+
+def format_instance(inst):
+    threshold, lvec, bvec = inst
+    return ' '.join(map(str, [len(lvec), threshold] + list(lvec) + list(bvec)))
+
+
+def is_binary(name):
+    with open(name, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
 
+
+def read(name):
+    # stream the instances of a text (or binary) dataset file
+    if is_binary(name):
+        yield from BinaryDataset(name)
+        return
+    nb_instances = None
     counter = 0
-    for line in lines[1:]:
-        if len(line.strip()) == 0:
-            continue
-        line = line.split()
-        nb_items = int(line[0])
-        threshold = int(line[1])
-        line = [int(v) for v in line[2:]]
-        inst = threshold, line[:nb_items], line[nb_items:2 * nb_items]
-        yield strip_large_parts(inst)
-        counter += 1
+    with open(name, 'r') as f:
+        for line in f:
+            if nb_instances is None:
+                nb_instances = int(line)
+                continue
+            if len(line.strip()) == 0:
+                continue
+            yield parse(line)
+            counter += 1
     assert counter == nb_instances
+
+
+def write(name, instances):
+    instances = list(instances)
+    with open(name, 'w') as f:
+        f.write(f'{len(instances)}\n')
+        for inst in instances:
+            f.write(format_instance(inst) + '\n')
+
+
+def line_offsets(name, chunk_size=2 ** 26):
+    # byte offsets of all non-blank lines, scanning the file in chunks
+    import numpy as np
+    offsets = []
+    with open(name, 'rb') as f:
+        base, rest = 0, b''
+        while True:
+            chunk = f.read(chunk_size)
+            buf = rest + chunk
+            cut = buf.rfind(b'\n') + 1 if chunk else len(buf)
+            arr = np.frombuffer(buf, dtype=np.uint8, count=cut)
+            ends = np.append(np.flatnonzero(arr == ord('\n')), cut)
+            starts = np.append(0, ends[:-1] + 1)
+            nonblank = np.append(0, np.cumsum(arr > ord(' ')))
+            offsets.append(base + starts[nonblank[ends] > nonblank[starts]])
+            if not chunk:
+                break
+            base, rest = base + cut, buf[cut:]
+    return np.concatenate(offsets)
+
+
+class Dataset(abc.ABC):
+    # random access to the instances of a dataset file
+    @abc.abstractmethod
+    def __len__(self):
+        pass
+
+    @abc.abstractmethod
+    def __getitem__(self, idx):
+        pass
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def shard(self, rank, nb_shards):
+        # (idx, inst) for the rank-th of nb_shards contiguous parts
+        n = len(self)
+        for idx in range(rank * n // nb_shards, (rank + 1) * n // nb_shards):
+            yield idx, self[idx]
+
+
+class TextDataset(Dataset):
+    # text dataset with an index of the line offsets of all instances
+    def __init__(self, name):
+        self.name = name
+        offsets = line_offsets(name)
+        with open(name, 'r') as f:
+            nb_instances = int(f.readline())
+        self.offsets = offsets[1:]
+        assert len(self.offsets) == nb_instances
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, idx):
+        with open(self.name, 'rb') as f:
+            f.seek(int(self.offsets[idx]))
+            return parse(f.readline().decode())
+
+
+class BinaryDataset(Dataset):
+    # memory-mapped binary dataset, only the accessed instances are read (items
+    # not shorter than the threshold are dropped as for text files)
+    def __init__(self, name):
+        import numpy as np
+        self.name = name
+        with open(name, 'rb') as f:
+            assert f.read(len(MAGIC)) == MAGIC, 'not a binary dataset'
+            nb_instances, nb_items = np.frombuffer(f.read(16), dtype=DTYPES[0]).tolist()
+        pos = len(MAGIC) + 16
+        arrays = []
+        for size, dtype in zip([nb_instances + 1, nb_instances, nb_items, nb_items], DTYPES):
+            if size == 0:
+                arrays.append(np.zeros(0, dtype=dtype))
+            else:
+                arrays.append(np.memmap(name, dtype=dtype, mode='r', offset=pos, shape=(size,)))
+            pos += np.dtype(dtype).itemsize * size
+        self.offsets, self.thresholds, self.lengths, self.counts = arrays
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def __getitem__(self, idx):
+        lo, hi = self.offsets[idx], self.offsets[idx + 1]
+        return strip_large_parts((int(self.thresholds[idx]), self.lengths[lo:hi].tolist(), self.counts[lo:hi].tolist()))
+
+    def __iter__(self, block=2 ** 16):
+        # convert blocks of instances at once
+        for first in range(0, len(self), block):
+            offsets = self.offsets[first:first + block + 1]
+            lo, hi = offsets[0], offsets[-1]
+            lengths, counts = self.lengths[lo:hi].tolist(), self.counts[lo:hi].tolist()
+            bounds = (offsets - lo).tolist()
+            for threshold, i, j in zip(self.thresholds[first:first + block].tolist(), bounds, bounds[1:]):
+                yield strip_large_parts((threshold, lengths[i:j], counts[i:j]))
+
+
+def write_binary(name, instances):
+    import numpy as np
+    offsets, thresholds, lengths, counts = array.array('q', [0]), array.array('q'), array.array('q'), array.array('q')
+    for threshold, lvec, bvec in instances:
+        thresholds.append(threshold)
+        lengths.extend(lvec)
+        counts.extend(bvec)
+        offsets.append(len(lengths))
+    with open(name, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.array([len(thresholds), len(lengths)], dtype=DTYPES[0]).tobytes())
+        for arr, dtype in zip([offsets, thresholds, lengths, counts], DTYPES):
+            arr = np.frombuffer(arr, dtype=arr.typecode)
+            assert np.array_equal(arr.astype(dtype), arr), 'value out of range'
+            f.write(arr.astype(dtype).tobytes())
+
+
+def open_dataset(name):
+    return BinaryDataset(name) if is_binary(name) else TextDataset(name)
@@ -0,0 +1,120 @@
+import collections
+import numpy as np
+
+from . import backend as _backend
+from . import graph
+
+
+class FlowIndex:
+    # positive arc values with outgoing adjacency lists (sorted by head) and
+    # per node pointers to the first arc which still carries flow
+    def __init__(self, arcs, vals, eps=1e-6, mask=None):
+        pos = vals > eps
+        if mask is not None:
+            pos &= mask
+        idx = np.flatnonzero(pos)
+        order = np.lexsort((arcs['end'][idx], arcs['start'][idx]))
+        idx = idx[order]
+        self.eps = eps
+        self.arcs = arcs[idx]
+        self.vals = vals[idx].tolist()
+        self.start = self.arcs['start'].tolist()
+        self.end = self.arcs['end'].tolist()
+        self.item = self.arcs['item'].tolist()
+        self.kind = self.arcs['kind'].tolist()
+        nodes, first, count = np.unique(self.arcs['start'], return_index=True, return_counts=True)
+        self.ptr = dict(zip(nodes.tolist(), first.tolist()))
+        self.stop = dict(zip(nodes.tolist(), (first + count).tolist()))
+
+    def __len__(self):
+        return len(self.vals)
+
+    def out_arcs(self, node):
+        # all (positive or drained) arcs leaving node
+        if node not in self.ptr:
+            return range(0)
+        return range(self.ptr[node], self.stop[node])
+
+    def next_arc(self, node):
+        # first arc leaving node with positive flow (or None)
+        if node not in self.ptr:
+            return None
+        p, stop = self.ptr[node], self.stop[node]
+        while p < stop and self.vals[p] <= self.eps:
+            p += 1
+        self.ptr[node] = p
+        return p if p < stop else None
+
+    def add(self, a, val):
+        self.vals[a] += val
+        if self.vals[a] > self.eps and self.ptr[self.start[a]] > a:
+            self.ptr[self.start[a]] = a
+
+    def key(self, a):
+        return self.start[a], self.end[a], self.item[a], graph.KIND_NAMES[self.kind[a]]
+
+
+def cancel_cycles(arcs, vals, eps=1e-6):
+    # flow without circulations: the minimal value of every cycle of positive
+    # arcs (found by a depth-first search) is removed along the cycle, which
+    # keeps all nodes balanced; returns the new values
+    vals = np.array(vals, dtype=float)
+    idx = np.flatnonzero(vals > eps)
+    idx = idx[np.argsort(arcs['start'][idx], kind='stable')]
+    start, end = arcs['start'][idx].tolist(), arcs['end'][idx].tolist()
+    val = vals[idx].tolist()
+    out = collections.defaultdict(list)
+    for a, i in enumerate(start):
+        out[i].append(a)
+    ptr = dict.fromkeys(out, 0)
+    # 0: not visited, 1: on the stack, 2: done (no cycle reachable)
+    state = collections.defaultdict(int)
+    for root in list(out):
+        if state[root] != 0:
+            continue
+        nodes, path, pos = [root], [], {root: 0}
+        state[root] = 1
+        while nodes:
+            u = nodes[-1]
+            succ = out.get(u, [])
+            while ptr.get(u, 0) < len(succ) and (val[succ[ptr[u]]] <= eps or state[end[succ[ptr[u]]]] == 2):
+                ptr[u] += 1
+            if ptr.get(u, 0) == len(succ):
+                state[u] = 2
+                nodes.pop()
+                del pos[u]
+                if path:
+                    path.pop()
+                continue
+            a = succ[ptr[u]]
+            v = end[a]
+            if state[v] == 0:
+                state[v] = 1
+                pos[v] = len(nodes)
+                nodes.append(v)
+                path.append(a)
+                continue
+            # cycle from v along the path back to v, cut at its first drained arc
+            cycle = path[pos[v]:] + [a]
+            delta = min(val[c] for c in cycle)
+            for c in cycle:
+                val[c] -= delta
+            cut = pos[v] + next(k for k, c in enumerate(cycle) if val[c] <= eps)
+            for w in nodes[cut + 1:]:
+                state[w] = 0
+                del pos[w]
+            del nodes[cut + 1:]
+            del path[cut:]
+    vals[idx] = val
+    return vals
+
+
+def flow_index(model, eps=1e-6, kinds=None, acyclic=False):
+    # index of the positive arc values of a solved model; kinds optionally
+    # restricts the adjacency lists to some arc kinds, acyclic=True removes
+    # circulations first (for graphs with cycles)
+    arcs, vals = _backend.solution_arrays(model)
+    if acyclic:
+        vals = cancel_cycles(arcs, vals, eps)
+    mask = None if kinds is None else np.isin(arcs['kind'], kinds)
+    return FlowIndex(arcs, vals, eps, mask)
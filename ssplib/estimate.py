@@ -0,0 +1,186 @@
+import os
+import numpy as np
+
+from . import graph
+from . import mitm
+
+# memory of a built model per nonzero of the constraint matrix (resident size
+# after build and update, measured for all models on random instances with up
+# to 1.8M arcs and rounded up)
+BYTES_PER_NZ = dict(gurobi=200, highs=70)
+
+
+# node masks of the arc generation of the models, without creating the arcs:
+# active nodes, starts of the item arcs per item (for mitm the starts of the
+# first part and the heads of the second one) and the nodes joined by the
+# chain of loss arcs
+def _arcflow_masks(inst):
+    threshold, lvec, bvec = inst
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    starts = []
+    for lk, bk in zip(lvec, bvec):
+        is_start = graph.shift_union(is_active[:threshold], lk, bk)
+        starts.append(np.flatnonzero(is_start))
+        is_active[lk:] |= is_start[:threshold - lk + 1]
+        is_active[threshold] |= is_start[threshold - lk:].any()
+    return dict(active=is_active, starts=starts, loss=np.zeros(threshold + 1, dtype=bool))
+
+
+def _larcflow_masks(inst):
+    threshold, lvec, bvec = inst
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    is_tail = np.zeros(threshold, dtype=bool)
+    min_shifted = threshold
+    starts = []
+    for lk, bk in zip(lvec, bvec):
+        is_start = graph.shift_union(is_active[:threshold], lk, bk)
+        if is_start[threshold - lk + 1:].any():
+            min_shifted = min(min_shifted, threshold - lk)
+            is_start[threshold - lk + 1:] = False
+            is_start[threshold - lk] = True
+        starts.append(np.flatnonzero(is_start))
+        is_active[lk:] |= is_start[:threshold - lk + 1]
+        is_tail |= is_start
+    is_active[:threshold] |= is_tail
+    is_loss = np.zeros(threshold + 1, dtype=bool)
+    is_loss[min_shifted:threshold] = is_active[min_shifted:threshold]
+    return dict(active=is_active, starts=starts, loss=is_loss)
+
+
+def _reflect_masks(inst):
+    threshold, lvec, bvec = inst
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    souvenir = np.zeros(threshold + 1, dtype=bool)
+    souvenir[0] = True
+    min_rpoint = threshold
+    starts = []
+    for lk, bk in zip(lvec, bvec):
+        step = 2 * lk
+        # the starts of all repetitions at once (see reflect.arc_arrays)
+        is_start = graph.shift_union(souvenir[:threshold], step, bk)
+        starts.append(np.flatnonzero(is_start))
+        if step <= threshold:
+            souvenir[step:] |= is_start[:threshold - step + 1]
+            is_active[step:] |= is_start[:threshold - step + 1]
+        first = max(threshold - step + 1, 0)
+        rends = 2 * threshold - step - (np.flatnonzero(is_start[first:]) + first)
+        if len(rends) > 0:
+            min_rpoint = min(min_rpoint, int(rends.min()))
+            is_active[rends] = True
+    # (the loss arcs end at the threshold)
+    is_loss = np.zeros(threshold + 1, dtype=bool)
+    is_loss[min_rpoint:] = is_active[min_rpoint:]
+    is_loss[threshold] = True
+    return dict(active=is_active, starts=starts, loss=is_loss)
+
+
+def _mitm_masks(inst, middle=None):
+    # (the candidate starts and heads are needed to choose the middle)
+    threshold, lvec, bvec = inst
+    starts, heads = mitm._left_starts(inst), mitm._right_heads(inst)
+    if middle is None:
+        middle = mitm._best_middle(threshold, starts, heads)
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    left, right = [], []
+    max_end, min_tail = -1, threshold
+    for lk, s, h in zip(lvec, starts, heads):
+        s, h = s[s < middle], h[h > middle]
+        left.append(s)
+        right.append(h)
+        ends = np.minimum(threshold, s + lk)
+        is_active[s] = is_active[ends] = is_active[h] = is_active[h - lk] = True
+        if len(ends) > 0 and ends.min() < threshold:
+            max_end = max(max_end, int(ends[ends < threshold].max()))
+        if len(h) > 0:
+            min_tail = min(min_tail, int(h.min()) - lk)
+    is_loss = np.zeros(threshold + 1, dtype=bool)
+    if max_end >= min_tail:
+        is_loss[min_tail:max_end + 1] = is_active[min_tail:max_end + 1]
+    return dict(active=is_active, starts=left, heads=right, loss=is_loss)
+
+
+MASKS = dict(arcflow=_arcflow_masks, larcflow=_larcflow_masks, reflect=_reflect_masks, mitm=_mitm_masks)
+
+
+def _size(masks):
+    # numbers of nodes, all arcs and item arcs (a chain of loss arcs joins all
+    # its nodes)
+    nb_arcs = sum(len(s) for s in masks['starts'] + masks.get('heads', []))
+    nb_loss = max(int(np.count_nonzero(masks['loss'])) - 1, 0)
+    return int(np.count_nonzero(masks['active'])), nb_arcs + nb_loss, nb_arcs
+
+
+# graph sizes (nodes, all arcs and item arcs) of the models
+def _arcflow_size(inst):
+    return _size(_arcflow_masks(inst))
+
+
+def _larcflow_size(inst):
+    return _size(_larcflow_masks(inst))
+
+
+def _reflect_size(inst):
+    # (and the reflection arc at the threshold)
+    nodes, arcs, item_arcs = _size(_reflect_masks(inst))
+    return nodes, arcs + 1, item_arcs
+
+
+def _mitm_size(inst):
+    return _size(_mitm_masks(inst))
+
+
+SIZES = dict(arcflow=_arcflow_size, larcflow=_larcflow_size, reflect=_reflect_size, mitm=_mitm_size)
+# nonzeros per arc in the flow constraints (two nodes, for reflect also the
+# loss inequalities and the reflection count)
+NZ_PER_ARC = dict(arcflow=2, larcflow=2, reflect=3, mitm=2)
+
+
+def graph_size(inst, model):
+    # numbers of nodes and arcs of the model graph (without reduction) and the
+    # estimated nonzeros (item arcs also appear in the item constraints)
+    nodes, arcs, item_arcs = SIZES[model](inst)
+    return dict(nodes=nodes, arcs=arcs, nb_nzs=NZ_PER_ARC[model] * arcs + item_arcs)
+
+
+def build_memory(size, backend='gurobi'):
+    # estimated memory (bytes) of a model with the given graph size
+    return BYTES_PER_NZ[backend] * size['nb_nzs']
+
+
+def available_memory():
+    # memory available for new allocations (None if unknown)
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def select_model(inst, model='auto', backend='gurobi', memory_budget=None, models=tuple(SIZES)):
+    # name of the model to build: the given one or for model='auto' the one
+    # with the smallest estimated graph; raises MemoryError if its build is
+    # estimated to exceed memory_budget (bytes); without a budget, only
+    # model='auto' is checked (against the available memory) and a given model
+    # is returned as it is
+    if model != 'auto' and memory_budget is None:
+        return model
+    if memory_budget is None:
+        memory_budget = available_memory()
+    sizes = {name: graph_size(inst, name) for name in (models if model == 'auto' else [model])}
+    name = min(sizes, key=lambda name: sizes[name]['nb_nzs'])
+    need = build_memory(sizes[name], backend)
+    if memory_budget is not None and need > memory_budget:
+        raise MemoryError(
+            f'building {name} needs about {need / 2 ** 20:.1f} MB, the budget is {memory_budget / 2 ** 20:.1f} MB'
+        )
+    return name
@@ -1,25 +1,132 @@
-import numpy as np
 import collections
-import itertools
+import math
 
 
-def all(threshold, n, exact_n=False):
-    last_n = 0
-    for items in itertools.combinations_with_replacement(range(1 if exact_n else 0, threshold), n):
+# the instances of all() correspond to the multisets of n values from
+# range(lo, threshold) (lo = 1 if exact_n else 0, where 0 means no item) in the
+# lexicographic order of itertools.combinations_with_replacement; they are
+# ranked by counting the multisets which come first
+def _range(threshold, exact_n):
+    lo = 1 if exact_n else 0
+    return lo, threshold - lo
+
+
+def _completions(nb_values, first, size):
+    # number of nondecreasing sequences of given size with values in range(first, nb_values)
+    # (one empty sequence, none of positive size without values)
+    if size == 0:
+        return 1
+    return math.comb(max(nb_values - first, 0) + size - 1, size)
+
+
+def count(threshold, n, exact_n=False):
+    _, nb_values = _range(threshold, exact_n)
+    return _completions(nb_values, 0, n)
+
+
+def rank(items, threshold, exact_n=False):
+    lo, nb_values = _range(threshold, exact_n)
+    n = len(items)
+    index, prev = 0, 0
+    for i, v in enumerate(items):
+        v -= lo
+        # sequences with a smaller value at position i (hockey stick identity)
+        size = n - i - 1
+        index += _completions(nb_values, prev, size + 1) - _completions(nb_values, v, size + 1)
+        prev = v
+    return index
+
+
+def unrank(index, threshold, n, exact_n=False):
+    lo, nb_values = _range(threshold, exact_n)
+    assert 0 <= index < count(threshold, n, exact_n), 'index out of range'
+    items, v = [], 0
+    for i in range(n):
+        size = n - i - 1
+        while index >= _completions(nb_values, v, size):
+            index -= _completions(nb_values, v, size)
+            v += 1
+        items.append(v + lo)
+    return tuple(items)
+
+
+def _successor(items, last):
+    # next multiset in lexicographic order (in place), False after the last one
+    for i in reversed(range(len(items))):
+        if items[i] < last:
+            items[i:] = [items[i] + 1] * (len(items) - i)
+            return True
+    return False
+
+
+def canonical_form(inst):
+    # equivalent instance with coprime lengths: if all lengths are multiples of
+    # g, so are all pattern lengths, and a pattern reaches the threshold iff it
+    # reaches the next multiple g * ceil(threshold / g); dividing by g gives the
+    # same patterns for the threshold ceil(threshold / g) (the instance of all()
+    # for that threshold with the same number of items, see rank)
+    threshold, lvec, bvec = inst
+    g = math.gcd(*lvec)
+    if g <= 1:
+        return inst
+    return -(-threshold // g), [li // g for li in lvec], list(bvec)
+
+
+def is_canonical(inst):
+    # scaling filter: instances whose lengths have a common divisor g > 1 are
+    # equivalent to canonical_form(inst), which belongs to the enumeration of a
+    # smaller threshold (instances of the same threshold are never equivalent
+    # by scaling, so this only skips duplicates across thresholds)
+    _, lvec, _ = inst
+    return math.gcd(*lvec) <= 1
+
+
+def ranked(threshold, n, exact_n=False, start=0, stop=None, canonical=False):
+    # (index, instance) of all() for the indices in range(start, stop), with
+    # canonical=True only those with coprime lengths (see is_canonical)
+    stop = count(threshold, n, exact_n) if stop is None else min(stop, count(threshold, n, exact_n))
+    if start >= stop:
+        return
+    items = list(unrank(start, threshold, n, exact_n))
+    for index in range(start, stop):
         ls, bs = [], []
         for li, bi in sorted(collections.Counter(items).items(), reverse=True):
             if li == 0:
                 continue
             ls.append(li)
             bs.append(bi)
-        n = sum(bs)
-        if n > last_n:
-            print('n = {}'.format(n))
-            last_n = n
-        yield threshold, ls, bs
+        inst = threshold, ls, bs
+        if not canonical or is_canonical(inst):
+            yield index, inst
+        _successor(items, threshold - 1)
+
+
+def shard_range(threshold, n, rank, nb_shards, exact_n=False):
+    # indices of the rank-th of nb_shards contiguous parts of all()
+    total = count(threshold, n, exact_n)
+    return rank * total // nb_shards, (rank + 1) * total // nb_shards
+
+
+def all(threshold, n, exact_n=False, start=0, stop=None, shard=None, canonical=False, verbose=True):
+    # instances with up to n (exactly n if exact_n) items shorter than the
+    # threshold; shard = (rank, nb_shards) restricts them to one part and
+    # start (e.g. the index after the last one processed) resumes a run;
+    # canonical=True skips the instances equivalent to ones of smaller
+    # thresholds (see is_canonical)
+    if shard is not None:
+        lo, hi = shard_range(threshold, n, *shard, exact_n=exact_n)
+        start, stop = max(start, lo), hi if stop is None else min(stop, hi)
+    last_n = 0
+    for _, inst in ranked(threshold, n, exact_n, start, stop, canonical):
+        nb = sum(inst[2])
+        if verbose and nb > last_n:
+            print('n = {}'.format(nb))
+            last_n = nb
+        yield inst
 
 
 def random(threshold, lmin, lmax, n):
+    import numpy as np
     parts = collections.Counter()
     for r in np.random.randint(lmin, lmax, size=n):
         parts[r] += 1
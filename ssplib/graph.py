@@ -0,0 +1,134 @@
+import numpy as np
+
+# arc kinds: standard (item) arcs, loss arcs and reflected arcs
+KIND_S, KIND_L, KIND_R = 0, 1, 2
+KIND_CODES = (KIND_S, KIND_L, KIND_R)
+KIND_NAMES = ('s', 'l', 'r')
+
+ARC_DTYPE = np.dtype([
+    ('start', np.int32),
+    ('end', np.int32),
+    ('item', np.int32),
+    ('kind', np.int8),
+])
+
+
+def make_arcs(start, end, item, kind=KIND_S):
+    start = np.asarray(start)
+    arcs = np.empty(start.shape[0], dtype=ARC_DTYPE)
+    arcs['start'] = start
+    arcs['end'] = end
+    arcs['item'] = item
+    arcs['kind'] = kind
+    return arcs
+
+
+def concat(parts):
+    if len(parts) == 0:
+        return np.empty(0, dtype=ARC_DTYPE)
+    return np.concatenate(parts)
+
+
+def shift_union(mask, length, count):
+    # union of mask shifted by 0, length, ..., (count - 1) * length
+    # (computed with O(log count) shifts by binary decomposition of count)
+    size = mask.shape[0]
+    result = np.zeros_like(mask)
+    acc = mask.copy()
+    offset, span = 0, 1
+    while count > 0 and offset * length < size:
+        if count & 1:
+            shift = offset * length
+            result[shift:] |= acc[:size - shift]
+            offset += span
+        count >>= 1
+        shift = span * length
+        if count > 0 and shift < size:
+            acc[shift:] |= acc[:size - shift].copy()
+        span *= 2
+    return result
+
+
+def to_tuples(arcs, kind=True):
+    # set of (start, end, item[, kind name]) tuples
+    if kind:
+        return set(zip(
+            arcs['start'].tolist(),
+            arcs['end'].tolist(),
+            arcs['item'].tolist(),
+            [KIND_NAMES[k] for k in arcs['kind'].tolist()],
+        ))
+    return set(zip(
+        arcs['start'].tolist(),
+        arcs['end'].tolist(),
+        arcs['item'].tolist(),
+    ))
+
+
+def arc_keys(arcs, size):
+    # one int64 per arc (equal for parallel arcs) for nodes below size
+    key = (arcs['item'].astype(np.int64) + 1) * size + arcs['start']
+    return (key * size + arcs['end']) * len(KIND_CODES) + arcs['kind']
+
+
+def from_keys(keys, kind=True):
+    # arcs from (start, end, item[, kind name]) tuples
+    keys = list(keys)
+    if len(keys) == 0:
+        return make_arcs([], [], [])
+    start, end, item = (np.array(v) for v in list(zip(*keys))[:3])
+    kinds = [KIND_NAMES.index(key[3]) for key in keys] if kind else KIND_S
+    return make_arcs(start, end, item, kinds)
+
+
+def find_arcs(arcs, query):
+    # positions of the query arcs in arcs (-1 for missing ones)
+    if len(arcs) == 0:
+        return np.full(len(query), -1)
+    size = max(int(a[f].max(initial=0)) for a in [arcs, query] for f in ['start', 'end']) + 1
+    keys = arc_keys(arcs, size)
+    order = np.argsort(keys, kind='stable')
+    qkeys = arc_keys(query, size)
+    pos = np.minimum(np.searchsorted(keys[order], qkeys), len(keys) - 1)
+    return np.where(keys[order[pos]] == qkeys, order[pos], -1)
+
+
+def upper_bounds(arcs, bvec):
+    bvec = np.asarray(bvec, dtype=float)
+    ub = np.full(len(arcs), np.inf)
+    is_item = arcs['item'] >= 0
+    ub[is_item] = bvec[arcs['item'][is_item]]
+    return ub
+
+
+def incidence(rows, arcs, w_in=1, w_out=-1):
+    # sparse (rows x arcs) matrix with weight w_in at the row of the head
+    # and w_out at the row of the tail of each arc (nodes not in rows are skipped)
+    import scipy.sparse as sp
+    n = len(arcs)
+    cols = np.arange(n)
+    w_in = np.broadcast_to(np.asarray(w_in, dtype=float), (n,))
+    w_out = np.broadcast_to(np.asarray(w_out, dtype=float), (n,))
+    row_idx, col_idx, data = [], [], []
+    for ends, w in [(arcs['end'], w_in), (arcs['start'], w_out)]:
+        pos = np.searchsorted(rows, ends)
+        valid = (pos < len(rows)) & (w != 0)
+        valid[valid] = rows[pos[valid]] == ends[valid]
+        row_idx.append(pos[valid])
+        col_idx.append(cols[valid])
+        data.append(w[valid])
+    mat = sp.csr_matrix(
+        (np.concatenate(data), (np.concatenate(row_idx), np.concatenate(col_idx))),
+        shape=(len(rows), n),
+    )
+    mat.eliminate_zeros()
+    return mat
+
+
+def item_matrix(arcs, m):
+    import scipy.sparse as sp
+    cols = np.flatnonzero(arcs['item'] >= 0)
+    return sp.csr_matrix(
+        (np.ones(len(cols)), (arcs['item'][cols], cols)),
+        shape=(m, len(arcs)),
+    )
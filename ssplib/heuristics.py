@@ -1,8 +1,9 @@
 import collections
-import gurobipy
-from gurobipy import GRB
 import math
 
+# numpy and the solver backend are imported where they are needed, so the pure
+# Python heuristics and bounds load fast and work without them
+
 
 def extract_simple(threshold, lvec, uvec):
     solution = collections.Counter()
@@ -49,28 +50,87 @@ def extract_simple(threshold, lvec, uvec):
     return solution, current_length
 
 
-def extract_ssp_solution(threshold, lvec, uvec):
+def extract_ssp_solution(threshold, lvec, uvec, backend='gurobi'):
+    from . import backend as _backend
     m = len(lvec)
-    model = gurobipy.Model()
-    model.setParam(GRB.Param.OutputFlag, False)
-    x = model.addVars(range(m), ub=uvec, vtype=GRB.INTEGER)
-    model.setObjective(x.prod(lvec))
-    model.addConstr(x.prod(lvec), sense=GRB.GREATER_EQUAL, rhs=threshold)
+    problem = _backend.Problem(None, ub=uvec)
+    problem.set_objective(lvec, maximize=False)
+    problem.add_constr(lvec, '>', threshold)
+    model = _backend.create(problem, backend)
+    model.setParam('OutputFlag', False)
     model.optimize()
 
-    if model.getAttr(GRB.Attr.Status) == GRB.Status.INTERRUPTED:
+    if model.status == _backend.INTERRUPTED:
         raise Exception('Terminated.')
 
+    x = _backend.values(model)
     solution = {}
     for k in range(m):
-        xk = int(x[k].getAttr('x'))
+        xk = int(round(x[k]))
         if xk > 0:
             solution[k] = xk
             uvec[k] -= xk
-    length = int(model.getAttr(GRB.Attr.ObjVal))
+    length = int(round(model.objVal))
     return solution, length
 
 
+class SubsetSumOracle:
+    # pattern of minimal length >= threshold for bounded multiplicities uvec by
+    # a subset-sum DP over boolean masks of reachable lengths (one layer per
+    # item); layers are only recomputed from a changed multiplicity on until
+    # the reachable lengths agree with the previous call again, so repeated
+    # calls with shrinking uvec are cheap
+    def __init__(self):
+        self.threshold = None
+        self.lvec = None
+        self.uvec = []
+        self.layers = []
+        # number of layers computed by the DP so far
+        self.computed = 0
+
+    def __call__(self, threshold, lvec, uvec):
+        import numpy as np
+        from . import graph
+        m = len(lvec)
+        if threshold != self.threshold or list(lvec) != self.lvec:
+            self.threshold, self.lvec, self.uvec = threshold, list(lvec), []
+            start = np.zeros(threshold + max(lvec, default=1), dtype=bool)
+            start[0] = True
+            self.layers = [start]
+        # a layer of the previous call is kept if the layer in front of it is
+        # unchanged and so is the multiplicity of its item
+        old, self.layers = self.layers, self.layers[:1]
+        is_same = len(self.uvec) == m
+        for k in range(m):
+            if is_same and self.uvec[k] == uvec[k]:
+                self.layers.append(old[k + 1])
+                continue
+            layer = self.layers[k]
+            if uvec[k] > 0:
+                layer = graph.shift_union(layer, lvec[k], uvec[k] + 1)
+                self.computed += 1
+            self.layers.append(layer)
+            is_same = len(self.uvec) == m and np.array_equal(layer, old[k + 1])
+        self.uvec = list(uvec)
+
+        reachable = np.flatnonzero(self.layers[m][threshold:])
+        if len(reachable) == 0:
+            return {}, 0
+        length = threshold + int(reachable[0])
+        # reconstruct the counts (preferring the first items)
+        solution = {}
+        pos = length
+        for k in reversed(range(m)):
+            cand = pos - lvec[k] * np.arange(min(uvec[k], pos // lvec[k]) + 1)
+            take = int(np.argmax(self.layers[k][cand]))
+            if take > 0:
+                solution[k] = take
+                uvec[k] -= take
+                pos -= take * lvec[k]
+        assert pos == 0
+        return dict(sorted(solution.items())), length
+
+
 def check_solution(inst, solutions):
     threshold, lvec, bvec = inst
     m = len(lvec)
@@ -122,46 +182,92 @@ def heuristic_a(inst):
 
 
 def heuristic_b(inst):
-    return heuristic_sequential(inst, extract_ssp_solution)
+    return heuristic_sequential(inst, SubsetSumOracle())
 
 
-def heuristic_c(inst):
-    threshold, lvec, bvec = inst
+def _first_fit(threshold, lvec, bvec):
+    # first fit packing with a segment tree over the residual capacities of the
+    # bins; unopened bins have the full capacity, so the leftmost bin with
+    # enough room is either an open bin or the next one to open, and all copies
+    # of an item fitting into the found bin are packed at once
+    # at most one bin is at most half filled (as its items fit into all others);
+    # every copy of an item not shorter than the threshold fills a bin of its own
+    # (kept apart from the tree, whose leaves are the other bins in order)
+    full = []
+    total = sum(li * bi for li, bi in zip(lvec, bvec))
+    size = 1
+    while size < min(sum(bvec), 2 * total // threshold + 1):
+        size *= 2
+    tree = [threshold] * (2 * size)
     bins = []
-    m = len(lvec)
-    # pack each item
-    for k in range(m):
-        lk = lvec[k]
-        for _rep in range(bvec[k]):
-            # find first bin
-            for b in bins:
-                if b['length'] + lk <= threshold:
-                    b['length'] += lk
-                    b['content'][k] += 1
+    for k, lk in enumerate(lvec):
+        left = bvec[k]
+        if lk >= threshold:
+            full += [{'length': lk, 'content': collections.Counter({k: 1}), 'id': None} for _ in range(left)]
+            continue
+        while left > 0:
+            pos = 1
+            while pos < size:
+                pos = 2 * pos if tree[2 * pos] >= lk else 2 * pos + 1
+            if pos - size == len(bins):
+                bins.append({'length': 0, 'content': collections.Counter(), 'id': len(bins)})
+            b = bins[pos - size]
+            take = min(left, tree[pos] // lk)
+            b['length'] += take * lk
+            b['content'][k] += take
+            left -= take
+            tree[pos] -= take * lk
+            while pos > 1:
+                pos //= 2
+                residual = max(tree[2 * pos], tree[2 * pos + 1])
+                if tree[pos] == residual:
                     break
-            else:
-                # or create new bin
-                b = {'length': lk, 'content': collections.Counter([k]), 'id': len(bins)}
-                bins.append(b)
+                tree[pos] = residual
+    for b in full:
+        b['id'] = len(bins)
+        bins.append(b)
+    return bins
+
+
+def _minimal(threshold, lvec, content):
+    # drop copies of the last items as long as the pattern stays feasible
+    solution = {k: c for k, c in sorted(content.items()) if c > 0}
+    length = sum(lvec[k] * c for k, c in solution.items())
+    for k in reversed(list(solution)):
+        drop = min(solution[k], (length - threshold) // lvec[k])
+        length -= drop * lvec[k]
+        solution[k] -= drop
+        if solution[k] > 0:
+            break
+        del solution[k]
+    return solution
+
+
+def heuristic_c(inst):
+    return len(heuristic_c_solutions(inst))
+
+
+def heuristic_c_solutions(inst):
+    threshold, lvec, bvec = inst
+    bins = _first_fit(threshold, lvec, bvec)
     # find filled and not filled bins
-    filled, nfilled = [], []
+    filled, nfilled = [], collections.deque()
     for b in bins:
-        (filled if b['length'] == threshold else nfilled).append(b)
+        (filled if b['length'] >= threshold else nfilled).append(b)
 
-    # fill each bin
+    # fill each bin with the items of the last bins
     while len(nfilled) > 1:
-        first_bin = nfilled.pop(0)
+        first_bin = nfilled.popleft()
         while first_bin['length'] < threshold:
             last_bin = nfilled[-1]
             for k in reversed(sorted(last_bin['content'].keys())):
                 lk = lvec[k]
-                while last_bin['content'][k] > 0:
-                    last_bin['content'][k] -= 1
-                    first_bin['content'][k] += 1
-                    last_bin['length'] -= lk
-                    first_bin['length'] += lk
-                    if first_bin['length'] >= threshold:
-                        break
+                if last_bin['content'][k] > 0:
+                    move = min(last_bin['content'][k], -((first_bin['length'] - threshold) // lk))
+                    last_bin['content'][k] -= move
+                    first_bin['content'][k] += move
+                    last_bin['length'] -= move * lk
+                    first_bin['length'] += move * lk
                 if first_bin['length'] >= threshold:
                     break
             if last_bin['length'] <= 0:
@@ -169,9 +275,58 @@ def heuristic_c(inst):
                 break
         if first_bin['length'] >= threshold:
             filled.append(first_bin)
-    solutions = [b['content'] for b in filled]
+    solutions = [_minimal(threshold, lvec, b['content']) for b in filled]
     check_solution(inst, solutions)
-    return len(solutions)
+    return solutions
+
+
+def start_patterns(inst, patterns):
+    return best_solution(inst) if isinstance(patterns, str) and patterns == 'heuristic' else patterns
+
+
+def best_solution(inst):
+    # largest set of patterns found by the heuristics (with items in index order)
+    best = max([heuristic_a(inst), heuristic_b(inst), heuristic_c_solutions(inst)], key=len)
+    return [dict(sorted(pattern.items())) for pattern in best]
+
+
+def _pattern_items(lvec, uvec, lengths):
+    # item counts of a pattern given by item lengths (for equal lengths the
+    # item with the most copies left), None if the demand does not suffice
+    pattern = collections.Counter()
+    for lk in lengths:
+        cands = [k for k, li in enumerate(lvec) if li == lk and uvec[k] > pattern[k]]
+        if len(cands) == 0:
+            return None
+        pattern[max(cands, key=lambda k: uvec[k] - pattern[k])] += 1
+    return pattern
+
+
+def lp_rounding(inst, solution, eps=1e-6):
+    # integer solution from a fractional one in the format of extract_solution
+    # (value, length, item lengths and loss markers per pattern): the floor of
+    # the value of every feasible pattern (made minimal, largest values first,
+    # as far as the demand allows) and the best heuristic solution of the
+    # residual demand
+    threshold, lvec, bvec = inst
+    uvec = list(bvec)
+    solutions = []
+    for val, _length, items in sorted(solution, key=lambda s: -s[0]):
+        copies = math.floor(val + eps)
+        if copies == 0:
+            continue
+        pattern = _pattern_items(lvec, uvec, [lk for lk in items if not isinstance(lk, str)])
+        if pattern is None or sum(lvec[k] * c for k, c in pattern.items()) < threshold:
+            continue
+        pattern = _minimal(threshold, lvec, pattern)
+        copies = min([copies] + [uvec[k] // c for k, c in pattern.items()])
+        for k, c in pattern.items():
+            uvec[k] -= copies * c
+        solutions += [dict(pattern) for _ in range(copies)]
+    if sum(lk * uk for lk, uk in zip(lvec, uvec)) >= threshold:
+        solutions += best_solution((threshold, lvec, uvec))
+    check_solution(inst, solutions)
+    return solutions
 
 
 def upper_bound_a(inst):
@@ -183,3 +338,116 @@ def upper_bound_a(inst):
 def upper_bound_b(inst):
     threshold, lvec, bvec = inst
     return sum(bvec) // math.ceil(threshold / lvec[0])
+
+
+def _pad(instances):
+    # thresholds and item arrays of many instances, padded with zero multiplicities
+    import numpy as np
+    m = max([len(lvec) for _, lvec, _ in instances] + [1])
+    thresholds = np.array([threshold for threshold, _, _ in instances], dtype=np.int64)
+    lmat = np.zeros((len(instances), m), dtype=np.int64)
+    bmat = np.zeros((len(instances), m), dtype=np.int64)
+    for r, (_, lvec, bvec) in enumerate(instances):
+        lmat[r, :len(lvec)] = lvec
+        bmat[r, :len(bvec)] = bvec
+    return thresholds, lmat, bmat
+
+
+def _last_item(key):
+    # largest item index used in each row of the key mask
+    return key.shape[1] - 1 - key[:, ::-1].argmax(axis=1)
+
+
+def extract_simple_batch(thresholds, lmat, umat):
+    # extract_simple for one pattern of each row (instance) at once, changes
+    # umat in place and returns the item counts and pattern lengths
+    import numpy as np
+    n, m = lmat.shape
+    rows = np.arange(n)
+    lsafe = np.maximum(lmat, 1)
+    solution = np.zeros((n, m), dtype=np.int64)
+    # items which are keys of the solution dict in extract_simple
+    key = np.zeros((n, m), dtype=bool)
+    current_length = np.zeros(n, dtype=np.int64)
+    # forward pass
+    for k in range(m):
+        fit = (umat[:, k] > 0) & (current_length + lmat[:, k] <= thresholds)
+        take = np.where(fit, np.minimum((thresholds - current_length) // lsafe[:, k], umat[:, k]), 0)
+        solution[:, k] = take
+        key[:, k] = fit
+        umat[:, k] -= take
+        current_length += take * lmat[:, k]
+    # backward pass
+    active = current_length < thresholds
+    for k in reversed(range(m)):
+        fit = active & (umat[:, k] > 0) & (current_length + lmat[:, k] >= thresholds)
+        umat[fit, k] -= 1
+        current_length[fit] += lmat[fit, k]
+        solution[fit, k] += 1
+        key[fit, k] = True
+        active &= ~fit
+    # final pass
+    active = current_length < thresholds
+    for k in reversed(range(m)):
+        fit = active & (umat[:, k] > 0)
+        take = np.where(fit, np.minimum((thresholds - current_length) // lsafe[:, k], umat[:, k]), 0)
+        solution[fit, k] = take[fit]
+        key[fit, k] = True
+        umat[:, k] -= take
+        current_length += take * lmat[:, k]
+        active &= current_length < thresholds
+    # remove unused items (all removable copies of the last item at once)
+    small_k = _last_item(key)
+    while True:
+        last_lk = lsafe[rows, small_k]
+        drop = (current_length - thresholds) // last_lk
+        r = np.flatnonzero(drop > 0)
+        if len(r) == 0:
+            break
+        s = small_k[r]
+        count = solution[r, s]
+        drop = np.where(count > 0, np.minimum(drop[r], count), drop[r])
+        current_length[r] -= drop * lmat[r, s]
+        solution[r, s] -= drop
+        umat[r, s] += drop
+        empty = solution[r, s] == 0
+        key[r[empty], s[empty]] = False
+        small_k[r[empty]] = _last_item(key[r[empty]])
+    return solution, current_length
+
+
+def _heuristic_a_batch(thresholds, lmat, bmat):
+    import numpy as np
+    umat = bmat.copy()
+    remaining = (lmat * bmat).sum(axis=1)
+    count = np.zeros(len(thresholds), dtype=np.int64)
+    active = remaining >= thresholds
+    while active.any():
+        idx = np.flatnonzero(active)
+        uvec = umat[idx]
+        _, length = extract_simple_batch(thresholds[idx], lmat[idx], uvec)
+        umat[idx] = uvec
+        ok = length >= thresholds[idx]
+        count[idx[ok]] += 1
+        remaining[idx] -= length
+        active[idx] = ok & (remaining[idx] >= thresholds[idx])
+    return count
+
+
+def batch(instances, method='a'):
+    # number of patterns found by a heuristic (or the value of an upper bound)
+    # for many instances; heuristic a and the upper bounds are evaluated on all
+    # instances at once, the other heuristics one instance after another
+    import numpy as np
+    instances = list(instances)
+    if method in ('b', 'c'):
+        single = dict(b=lambda inst: len(heuristic_b(inst)), c=heuristic_c)[method]
+        return np.array([single(inst) for inst in instances], dtype=np.int64)
+    thresholds, lmat, bmat = _pad(instances)
+    if method == 'a':
+        return _heuristic_a_batch(thresholds, lmat, bmat)
+    if method == 'upper_a':
+        return (lmat * bmat).sum(axis=1) // thresholds
+    if method == 'upper_b':
+        return bmat.sum(axis=1) // -(-thresholds // np.maximum(lmat[:, 0], 1))
+    raise ValueError(f'unknown method {method}')
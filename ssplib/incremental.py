@@ -0,0 +1,110 @@
+import functools
+import numpy as np
+
+from . import arcflow
+from . import backend as _backend
+from . import estimate
+from . import graph
+from . import larcflow
+from . import mitm
+from . import reflect
+
+MODELS = dict(arcflow=arcflow, larcflow=larcflow, reflect=reflect, mitm=mitm)
+
+
+def enabled_arcs(arcs, sub):
+    # arcs of a supergraph which are needed to represent the subgraph sub (built
+    # for smaller demands): all item arcs of sub and loss arcs within its loss range
+    size = int(max(arcs['start'].max(initial=0), arcs['end'].max(initial=0))) + 1
+    is_item = arcs['item'] >= 0
+    enabled = ~is_item
+    enabled[is_item] = np.isin(graph.arc_keys(arcs[is_item], size), graph.arc_keys(sub[sub['item'] >= 0], size))
+    is_loss = arcs['kind'] == graph.KIND_L
+    sub_loss = sub[sub['kind'] == graph.KIND_L]
+    low = min(sub_loss['start'].min(), sub_loss['end'].min()) if len(sub_loss) > 0 else np.inf
+    enabled[is_loss] = np.minimum(arcs['start'][is_loss], arcs['end'][is_loss]) >= low
+    return enabled
+
+
+class ReusableModel:
+    # model for fixed (threshold, lvec) built once on the graph for the maximal
+    # multiplicities bmax; solve() only changes the item demands, the arc upper
+    # bounds (arcs missing from the graph for bvec are fixed to zero, which keeps
+    # the LP relaxation as strong as for a fresh build of the same graph) and the
+    # objective bound and re-optimizes from the previous solution (model='auto'
+    # and memory_budget as in estimate.select_model, for the graph of bmax);
+    # mitm keeps the middle chosen for bmax, so its LP relaxation can be weaker
+    # than for a fresh build, which chooses the middle for bvec
+    def __init__(
+        self, threshold, lvec, bmax, model='arcflow', relaxed=False, backend='gurobi', reduce=False, cache=None,
+        memory_budget=None,
+    ):
+        self.threshold = threshold
+        self.lvec = list(lvec)
+        self.bmax = list(bmax)
+        name = estimate.select_model((threshold, self.lvec, self.bmax), model, backend, memory_budget)
+        self.module = MODELS[name]
+        self.relaxed = relaxed
+        self.model = self.module.build(
+            (threshold, self.lvec, self.bmax), bound=np.inf, relaxed=relaxed,
+            backend=backend, reduce=reduce, cache=cache,
+        )
+        self.model.setParam('OutputFlag', 0)
+        # graphs for smaller demands are generated with the same middle (mitm)
+        middle = getattr(self.model, '_middle', None)
+        self.graph_options = {} if middle is None else dict(middle=middle)
+        self._masks = functools.partial(estimate.MASKS[name], **self.graph_options)
+        # positions of the item arcs of every item with the nodes looked up in
+        # the start masks of the arc generation (mitm: arcs of the first part
+        # by start, of the second one by head), so solve() only evaluates the
+        # masks for the new demands instead of generating their graph
+        arcs = self.model._arcs
+        self._anchors = []
+        for item, lk in enumerate(self.lvec):
+            pos = np.flatnonzero(arcs['item'] == item)
+            start, end = arcs['start'][pos], arcs['end'][pos]
+            if name != 'mitm':
+                self._anchors.append(('starts', item, pos, start))
+                continue
+            left = end == np.minimum(threshold, start + lk)
+            right = start == end - lk
+            self._anchors += [('starts', item, pos[left], start[left]), ('heads', item, pos[right], end[right])]
+        is_loss = arcs['kind'] == graph.KIND_L
+        self._loss = np.flatnonzero(is_loss), np.minimum(arcs['start'][is_loss], arcs['end'][is_loss])
+        self.last = None
+
+    def inst(self, bvec):
+        return self.threshold, self.lvec, list(bvec)
+
+    def enabled(self, bvec):
+        # arcs of the model which are needed for the graph of bvec (the same
+        # as enabled_arcs for a generated graph)
+        masks = self._masks(self.inst(bvec))
+        enabled = self.model._arcs['item'] < 0
+        is_node = np.zeros(self.threshold + 1, dtype=bool)
+        for part, item, pos, nodes in self._anchors:
+            is_node[:] = False
+            is_node[masks[part][item]] = True
+            enabled[pos] |= is_node[nodes]
+        loss_nodes = np.flatnonzero(masks['loss'])
+        pos, lows = self._loss
+        enabled[pos] = lows >= (loss_nodes[0] if len(loss_nodes) > 1 else np.inf)
+        return enabled
+
+    def solve(self, bvec, bound=None):
+        assert len(bvec) == len(self.lvec)
+        assert all(bi <= bmi for bi, bmi in zip(bvec, self.bmax)), 'demand exceeds bmax'
+        model = self.model
+        if self.last is not None and not self.relaxed:
+            # previous solution as MIP start (the simplex basis is kept anyway)
+            _backend.set_start(model, self.last)
+        _backend.set_rhs(model, 'items', bvec)
+        _backend.set_rhs(model, 'bound', [np.inf if bound is None else bound])
+        # disable arcs which are not part of the graph for bvec
+        _backend.set_bounds(model, ub=np.where(self.enabled(bvec), graph.upper_bounds(model._arcs, bvec), 0))
+        model.optimize()
+        self.last = _backend.values(model) if model.status == _backend.OPTIMAL else None
+        return model
+
+    def extract_solution(self, bvec, eps=1e-6):
+        return self.module.extract_solution(self.inst(bvec), self.model, eps)
@@ -1,53 +1,58 @@
-import gurobipy as gp
-from sortedcontainers import SortedSet
+import numpy as np
 import collections
 
-def create_larcflow_arcs(inst):
+from . import backend as _backend
+from . import cache as _cache
+from . import decompose
+from . import graph
+from . import heuristics
+from . import reduction
+from . import stats as _stats
+
+def arc_arrays(inst):
     threshold, lvec, bvec = inst
     m = len(lvec)
-    is_active = SortedSet([0])
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
 
     min_shifted = threshold
-    arcs = set()
+    parts = []
     for item in range(m):
-        for node in list(reversed(is_active)):
-            for rep in range(bvec[item]):
-                start = node + rep * lvec[item]
-                if start >= threshold:
-                    break
-                end = start + lvec[item]
-                if end > threshold:
-                    start = threshold - lvec[item]
-                    end = threshold
-                    min_shifted = min(min_shifted, start)
-                arcs.add((start, end, item, 's'))
-                is_active.add(end)
+        lk = lvec[item]
+        is_start = graph.shift_union(is_active[:threshold], lk, bvec[item])
+        # arcs leaving the threshold are shifted to end exactly at it
+        if is_start[threshold - lk + 1:].any():
+            min_shifted = min(min_shifted, threshold - lk)
+            is_start[threshold - lk + 1:] = False
+            is_start[threshold - lk] = True
+        starts = np.flatnonzero(is_start)
+        parts.append(graph.make_arcs(starts, starts + lk, item))
+        is_active[starts + lk] = True
+    arcs = graph.concat(parts)
     # activate all tails
-    for arc in arcs:
-        is_active.add(arc[0])
+    is_active[arcs['start']] = True
+
+    # create loss arcs between active nodes (in reversed order)
+    active_n = np.flatnonzero(is_active[:threshold])
+    active_n = active_n[active_n >= min_shifted][::-1]
+    loss = graph.make_arcs(active_n[:-1], active_n[1:], -1, graph.KIND_L)
 
-    # create list of active nodes in reversed order
-    active_n = []
-    for j in reversed(is_active):
-        if j == threshold:
-            continue
-        if j < min_shifted:
-            break
-        active_n.append(j)
-    # create loss arcs between active nodes
-    for i in range(len(active_n) - 1):
-        arcs.add((active_n[i], active_n[i + 1], -1, 'l'))
+    return np.flatnonzero(is_active), graph.concat([arcs, loss])
 
-    return is_active, arcs
+
+def create_larcflow_arcs(inst):
+    # compatibility wrapper: sorted list of nodes and set of arc tuples
+    nodes, arcs = arc_arrays(inst)
+    return nodes.tolist(), graph.to_tuples(arcs)
 
 
-def create_variable_start(inst, is_active, patterns):
+def create_variable_start(inst, nodes, patterns):
     threshold, lvec, bvec = inst
     vals = collections.Counter()
     loss = []
     for pattern in patterns:
         start = 0
-        for item, count in pattern.items():
+        for item, count in sorted(pattern.items()):
             for _ in range(count):
                 end = start + lvec[item]
                 if end > threshold:
@@ -61,46 +66,57 @@ def create_variable_start(inst, is_active, patterns):
                 start = end
     # add loss arc values
     for start, end in loss:
-        idxs = list(is_active.irange(end, start, reverse=True))
+        idxs = nodes[np.searchsorted(nodes, end):np.searchsorted(nodes, start, 'right')][::-1].tolist()
         for i, j in zip(idxs, idxs[1:]):
             vals[(i, j, -1, 'l')] += 1
     return vals
 
 
-def build(inst, patterns=None, bound=None, relaxed=False):
+def create_graph(inst, reduce=False):
+    threshold, lvec, bvec = inst
+    nodes, arcs = arc_arrays(inst)
+    info = None
+    if reduce:
+        inner = nodes[(nodes != 0) & (nodes != threshold)]
+        nodes, arcs, info = reduction.reduce_graph(nodes, arcs, inner, 1, -1, keep=[0, threshold])
+    return dict(nodes=nodes, arcs=arcs), dict(reduction=info)
+
+
+def build(inst, patterns=None, bound=None, relaxed=False, backend='gurobi', reduce=False, cache=None, stats=None):
     threshold, lvec, bvec = inst
     m = len(lvec)
     assert m == len(bvec)
-    is_active, arcs = create_larcflow_arcs(inst)
-    arcs = gp.tuplelist(arcs)
+    with _stats.phase(stats, 'graph'):
+        arrays, meta = _cache.fetch(cache, inst, 'larcflow', lambda: create_graph(inst, reduce), reduce=reduce)
+    nodes, arcs, info = arrays['nodes'], arrays['arcs'], meta['reduction']
+    inner = nodes[(nodes != 0) & (nodes != threshold)]
+    _stats.record(stats, nodes=len(nodes), arcs=len(arcs), reduction=info)
 
-    model = gp.Model()
-    x = model.addVars(arcs, name='x', vtype=gp.GRB.CONTINUOUS if relaxed else gp.GRB.INTEGER, ub=[
-        gp.GRB.INFINITY if arc[2] == -1 else bvec[arc[2]] for arc in arcs
-    ])
+    with _stats.phase(stats, 'matrices'):
+        problem = _backend.Problem(arcs, ub=graph.upper_bounds(arcs, bvec), integer=not relaxed)
 
-    # set start values
-    if patterns is not None:
-        for arc, count in create_variable_start(inst, is_active, patterns).items():
-            x[arc].start = count
+        # flow conservation in all inner nodes
+        problem.add_constrs(graph.incidence(inner, arcs), '=', np.zeros(len(inner)))
 
-    for j in is_active:
-        if j == 0 or j == threshold:
-            continue
-        model.addConstr(x.sum(j, '*', '*', '*') == x.sum('*', j, '*', '*'))
+        problem.add_constrs(graph.item_matrix(arcs, m), '<', bvec, name='items')
 
-    for i in range(m):
-        model.addConstr(x.sum('*', '*', i, '*') <= bvec[i])
+        obj = (arcs['end'] == threshold).astype(float)
+        problem.set_objective(obj)
 
-    obj = x.sum('*', threshold, '*', '*')
-    model.setObjective(obj, sense=gp.GRB.MAXIMIZE)
+        if bound is not None:
+            problem.add_constr(obj, '<', bound, name='bound')
 
-    if bound is not None:
-        model.addConstr(obj <= bound)
+    # set start values (patterns='heuristic' for the best heuristic solution)
+    if patterns is not None:
+        with _stats.phase(stats, 'start'):
+            patterns = heuristics.start_patterns(inst, patterns)
+            vals = create_variable_start(inst, nodes, patterns)
+            problem.set_start(vals)
+    model = _backend.create(problem, backend, stats)
+    model._reduction = info
     return model
 
 
-
 def format_solution(lvec, val, path):
     length = 0
     solution = []
@@ -119,39 +135,34 @@ def format_solution(lvec, val, path):
     return val, length, solution
 
 
-def _name2tuple(name):
-    i, j, k, t = name[2:-1].split(',')
-    return int(i), int(j), int(k), t
-
+@_stats.timed('extract')
 def extract_solution(inst, model, eps=1e-6):
     threshold, lvec, bvec = inst
 
-    vals = gp.tupledict([
-        (_name2tuple(v.varName), v.x)
-        for v in model.getVars()
-        if v.x > eps
-    ])
-    arcs = vals.keys()
+    # item arcs may start and end within the range of the loss arcs, so the
+    # graph has cycles and a solution may contain circulations, which are
+    # removed before the decomposition
+    index = decompose.flow_index(model, eps, acyclic=True)
+    vals = index.vals
 
     solutions = []
-    for arc0 in arcs.select(0):
+    for arc0 in index.out_arcs(0):
         while vals[arc0] > eps:
             minval = vals[arc0]
-            start, next_start, item, kind = arc0
+            next_start = index.end[arc0]
             current_path = [arc0]
             vals[arc0] -= minval
             while next_start < threshold:
-                next_arcs = [arc for arc in arcs.select(next_start) if vals[arc] > eps]
-                next_arcs.sort(key=lambda arc: arc[1])
-                assert len(next_arcs) > 0
-                arc1 = start, end, item, kind = next_arcs[0]
+                # arc with positive flow and smallest head
+                arc1 = index.next_arc(next_start)
+                assert arc1 is not None
                 if vals[arc1] < minval:
                     diff = minval - vals[arc1]
                     for arc in current_path:
-                        vals[arc] += diff
+                        index.add(arc, diff)
                     minval = vals[arc1]
                 vals[arc1] -= minval
                 current_path.append(arc1)
-                next_start = end
-            solutions.append((minval, current_path))
+                next_start = index.end[arc1]
+            solutions.append((minval, [index.key(arc) for arc in current_path]))
     return [format_solution(lvec, v, sol) for v, sol in solutions]
@@ -0,0 +1,163 @@
+import numpy as np
+import collections
+
+from . import backend as _backend
+from . import cache as _cache
+from . import graph
+from . import heuristics
+from . import reduction
+from . import stats as _stats
+# paths with loss arcs are decomposed exactly as in larcflow (the graph has
+# cycles as well: arcs of the second part may end within the loss range)
+from .larcflow import extract_solution
+
+
+# meet-in-the-middle graph: the items of a pattern (in order of decreasing
+# length) are placed from 0 as long as they start below the middle, the
+# remaining ones from the threshold downwards; both parts are joined by loss
+# arcs going down from the end of the first part to the start of the second one
+# (any path from 0 to the threshold has length >= threshold, and every minimal
+# pattern is a path for every middle in [1, threshold])
+def _left_starts(inst):
+    # starts of the arcs from 0 for all items (without restriction)
+    threshold, lvec, bvec = inst
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    starts = []
+    for item in range(len(lvec)):
+        starts.append(np.flatnonzero(graph.shift_union(is_active[:threshold], lvec[item], bvec[item])))
+        is_active[np.minimum(threshold, starts[-1] + lvec[item])] = True
+    return starts
+
+
+def _right_heads(inst):
+    # heads of the arcs to the threshold (placed downwards, smallest items
+    # first) with tails above 0 for all items
+    threshold, lvec, bvec = inst
+    is_active = np.zeros(threshold, dtype=bool)
+    is_active[0] = True
+    heads = [None] * len(lvec)
+    for item in reversed(range(len(lvec))):
+        dist = np.flatnonzero(graph.shift_union(is_active, lvec[item], bvec[item]))
+        dist = dist[dist + lvec[item] < threshold]
+        is_active[dist + lvec[item]] = True
+        heads[item] = threshold - dist[::-1]
+    return heads
+
+
+def _best_middle(threshold, starts, heads):
+    # middle minimizing the number of item arcs (starts below and heads above it)
+    empty = [np.zeros(0, dtype=np.int64)]
+    nb_left = np.bincount(np.concatenate(empty + starts), minlength=threshold + 1).cumsum()
+    nb_right = np.bincount(np.concatenate(empty + heads), minlength=threshold + 1)[::-1].cumsum()[::-1]
+    middles = np.arange(1, threshold + 1)
+    nb_arcs = nb_left[middles - 1] + np.append(nb_right[middles[:-1] + 1], 0)
+    return int(middles[np.argmin(nb_arcs)])
+
+
+def arc_arrays(inst, middle=None):
+    # middle=None chooses the middle with the fewest item arcs ((threshold + 1) // 2
+    # gives the plain meet-in-the-middle graph)
+    threshold, lvec, bvec = inst
+    starts, heads = _left_starts(inst), _right_heads(inst)
+    if middle is None:
+        middle = _best_middle(threshold, starts, heads)
+    assert 1 <= middle <= threshold, 'middle out of range'
+    parts = []
+    for item in range(len(lvec)):
+        s = starts[item][starts[item] < middle]
+        parts.append(graph.make_arcs(s, np.minimum(threshold, s + lvec[item]), item))
+    left = graph.concat(parts)
+    for item in range(len(lvec)):
+        h = heads[item][heads[item] > middle]
+        parts.append(graph.make_arcs(h - lvec[item], h, item))
+    arcs = graph.concat(parts)
+    right = arcs[len(left):]
+
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    is_active[arcs['start']] = True
+    is_active[arcs['end']] = True
+
+    # loss arcs (in reversed order) between the active nodes of the middle
+    left_ends = left['end'][left['end'] < threshold]
+    if len(left_ends) > 0 and len(right) > 0:
+        active_n = np.flatnonzero(is_active[:threshold])
+        active_n = active_n[(active_n >= right['start'].min()) & (active_n <= left_ends.max())][::-1]
+        arcs = graph.concat([arcs, graph.make_arcs(active_n[:-1], active_n[1:], -1, graph.KIND_L)])
+
+    return np.flatnonzero(is_active), middle, arcs
+
+
+def create_variable_start(inst, nodes, middle, patterns):
+    threshold, lvec, bvec = inst
+    vals = collections.Counter()
+    for pattern in patterns:
+        copies = [k for k, count in sorted(pattern.items()) for _ in range(count)]
+        start, first = 0, 0
+        while first < len(copies) and start < middle:
+            end = min(threshold, start + lvec[copies[first]])
+            vals[(start, end, copies[first], 's')] += 1
+            start = end
+            first += 1
+        if start == threshold:
+            continue
+        # remaining items from the threshold downwards
+        end = threshold
+        for item in reversed(copies[first:]):
+            vals[(end - lvec[item], end, item, 's')] += 1
+            end -= lvec[item]
+        # loss arcs from the end of the first part to the start of the second one
+        idxs = nodes[np.searchsorted(nodes, end):np.searchsorted(nodes, start, 'right')][::-1].tolist()
+        for i, j in zip(idxs, idxs[1:]):
+            vals[(i, j, -1, 'l')] += 1
+    return vals
+
+
+def create_graph(inst, reduce=False, middle=None):
+    threshold, lvec, bvec = inst
+    nodes, middle, arcs = arc_arrays(inst, middle)
+    info = None
+    if reduce:
+        inner = nodes[(nodes != 0) & (nodes != threshold)]
+        nodes, arcs, info = reduction.reduce_graph(nodes, arcs, inner, 1, -1, keep=[0, threshold])
+    return dict(nodes=nodes, arcs=arcs), dict(reduction=info, middle=middle)
+
+
+def build(
+    inst, patterns=None, bound=None, relaxed=False, backend='gurobi', reduce=False, cache=None, stats=None, middle=None,
+):
+    threshold, lvec, bvec = inst
+    m = len(lvec)
+    assert m == len(bvec)
+    with _stats.phase(stats, 'graph'):
+        arrays, meta = _cache.fetch(
+            cache, inst, 'mitm', lambda: create_graph(inst, reduce, middle), reduce=reduce, middle=middle,
+        )
+    nodes, arcs, info, middle = arrays['nodes'], arrays['arcs'], meta['reduction'], meta['middle']
+    inner = nodes[(nodes != 0) & (nodes != threshold)]
+    _stats.record(stats, nodes=len(nodes), arcs=len(arcs), reduction=info, middle=middle)
+
+    with _stats.phase(stats, 'matrices'):
+        problem = _backend.Problem(arcs, ub=graph.upper_bounds(arcs, bvec), integer=not relaxed)
+
+        # flow conservation in all inner nodes
+        problem.add_constrs(graph.incidence(inner, arcs), '=', np.zeros(len(inner)))
+
+        problem.add_constrs(graph.item_matrix(arcs, m), '<', bvec, name='items')
+
+        obj = (arcs['start'] == 0).astype(float)
+        problem.set_objective(obj)
+
+        if bound is not None:
+            problem.add_constr(obj, '<', bound, name='bound')
+
+    # set start values (patterns='heuristic' for the best heuristic solution)
+    if patterns is not None:
+        with _stats.phase(stats, 'start'):
+            patterns = heuristics.start_patterns(inst, patterns)
+            problem.set_start(create_variable_start(inst, nodes, middle, patterns))
+    model = _backend.create(problem, backend, stats)
+    model._reduction = info
+    model._middle = middle
+    return model
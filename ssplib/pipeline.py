@@ -0,0 +1,185 @@
+import collections
+import concurrent.futures
+import math
+import os
+import time
+import warnings
+
+import numpy as np
+
+from . import backend as _backend
+from . import estimate
+from . import heuristics
+from . import stats as _stats
+from .incremental import MODELS
+
+# value of the best solution, best proven upper bound, stage which closed the
+# gap (None if it is still open), heuristic patterns, the MIP model (if it had
+# to be solved), the time spent in each stage and the exception which stopped
+# the solve (only set by solve_many, which does not raise for single instances)
+Result = collections.namedtuple(
+    'Result', ['value', 'bound', 'stage', 'patterns', 'model', 'times', 'error'], defaults=[None],
+)
+
+
+def _stop_at(bound, stats=None):
+    # gurobipy callback terminating as soon as the incumbent reaches the bound
+    import gurobipy as gp
+
+    def callback(model, where):
+        if stats is not None:
+            stats.callback(model, where)
+        if where == gp.GRB.Callback.MIP and model.cbGet(gp.GRB.Callback.MIP_OBJBST) >= bound - 0.5:
+            model.terminate()
+        elif where == gp.GRB.Callback.MIPSOL and model.cbGet(gp.GRB.Callback.MIPSOL_OBJ) >= bound - 0.5:
+            model.terminate()
+    return callback
+
+
+def _has_solution(model):
+    if isinstance(model, _backend.HighsModel):
+        return model.X is not None
+    return model.SolCount > 0
+
+
+def fixable_arcs(relaxed, value, eps=1e-6):
+    # arcs which are zero in the solved LP relaxation and cannot be used by an
+    # integer solution of value > value: with the reduced cost rc <= 0 of an arc,
+    # every solution using it has value <= floor(LP value + rc)
+    x = _backend.values(relaxed)
+    rc = _backend.reduced_costs(relaxed)
+    return (x <= eps) & (np.floor(relaxed.objVal + rc + eps) <= value)
+
+
+def solve(
+    inst, model='reflect', backend='gurobi', lp=True, time_limit=None, reduce=False, cache=None, stats=None,
+    memory_budget=None, fixing=False,
+):
+    # solve the instance in stages of increasing cost (combinatorial bounds,
+    # heuristics, LP relaxation and its rounding, MIP) and stop as soon as the
+    # best solution value meets the best bound; model='auto' uses the model with
+    # the smallest estimated graph and MemoryError is raised before building a
+    # model which would exceed memory_budget (bytes; for model='auto' by default
+    # the available memory, other models are only checked with a budget); with
+    # fixing=True the MIP does not use the arcs which the reduced costs of the
+    # LP relaxation exclude from solutions better than the best known one
+    # (their number is recorded as fixed in stats and the MIP model)
+    times = {}
+    clock = [time.time()]
+
+    def lap(stage):
+        now = time.time()
+        times[stage] = now - clock[0]
+        clock[0] = now
+
+    # combinatorial bounds
+    bound = min(heuristics.upper_bound_a(inst), heuristics.upper_bound_b(inst)) if len(inst[1]) > 0 else 0
+    lap('bounds')
+    if bound <= 0:
+        return Result(0, 0, 'bounds', [], None, times)
+
+    # heuristics
+    patterns = heuristics.best_solution(inst)
+    value = len(patterns)
+    lap('heuristic')
+    if value >= bound:
+        return Result(value, bound, 'heuristic', patterns, None, times)
+
+    model = estimate.select_model(inst, model, backend, memory_budget)
+    module = MODELS[model]
+    _stats.record(stats, model=model)
+
+    # LP relaxation
+    if lp:
+        relaxed = module.build(inst, relaxed=True, backend=backend, reduce=reduce, cache=cache)
+        relaxed.setParam('OutputFlag', 0)
+        relaxed.optimize()
+        if relaxed.status == _backend.OPTIMAL:
+            bound = min(bound, math.floor(relaxed.objVal + 1e-6))
+        lap('lp')
+        if value >= bound:
+            return Result(value, bound, 'lp', patterns, None, times)
+
+        # rounding of the decomposed LP solution (the patterns of the LP
+        # solution rounded down and the residual demand packed heuristically)
+        if relaxed.status == _backend.OPTIMAL:
+            rounded = heuristics.lp_rounding(inst, module.extract_solution(inst, relaxed))
+            if len(rounded) > value:
+                patterns, value = rounded, len(rounded)
+            lap('rounding')
+            if value >= bound:
+                return Result(value, bound, 'rounding', patterns, None, times)
+
+    # MIP starting from the heuristic solution and bounded by the best bound
+    mip = module.build(inst, patterns=patterns, bound=bound, backend=backend, reduce=reduce, cache=cache, stats=stats)
+    if fixing and lp and relaxed.status == _backend.OPTIMAL:
+        fixed = fixable_arcs(relaxed, value)
+        _backend.fix_to_zero(mip, fixed)
+        mip._fixed = int(np.count_nonzero(fixed))
+        _stats.record(stats, fixed=mip._fixed)
+        lap('fixing')
+    mip.setParam('OutputFlag', 0)
+    if time_limit is not None:
+        mip.setParam('TimeLimit', time_limit)
+    if isinstance(mip, _backend.HighsModel):
+        # (the bound constraint closes the gap once the incumbent reaches it)
+        _stats.optimize(mip, stats)
+    else:
+        with _stats.phase(stats, 'optimize'):
+            mip.optimize(_stop_at(bound, stats))
+    if mip.status == _backend.OPTIMAL:
+        # (with fixing, the heuristic solution may be better than all solutions left)
+        value = bound = max(value, round(mip.objVal))
+    elif _has_solution(mip):
+        value = max(value, round(mip.objVal))
+    lap('mip')
+    return Result(value, bound, 'mip' if value >= bound else None, patterns, mip, times)
+
+
+def _init_worker(backend, threads):
+    if backend == 'gurobi':
+        _backend.init_env(OutputFlag=0, Threads=threads)
+
+
+def _solve_job(idx, inst, options):
+    # the model itself is not returned from the worker
+    return idx, solve(inst, **options)._replace(model=None)
+
+
+def _size(inst, model):
+    # estimated nonzeros of the model (of the smallest one for model='auto')
+    if len(inst[1]) == 0:
+        return 0
+    names = list(estimate.SIZES) if model == 'auto' else [model]
+    return min(estimate.graph_size(inst, name)['nb_nzs'] for name in names)
+
+
+def solve_many(instances, model='reflect', backend='gurobi', workers=None, threads_per_job=1, **options):
+    # solve() for many instances in worker processes (each with one shared
+    # solver environment), largest estimated models first; yields (index,
+    # result) pairs as soon as they are done; threads_per_job is the Gurobi
+    # thread limit of each job, HiGHS (through scipy) takes no thread limit,
+    # so for backend='highs' it only sets the default number of workers; a job
+    # raising an exception (e.g. MemoryError for model='auto') gives a result
+    # with value None and the exception as error
+    instances = list(instances)
+    nb_cpus = os.cpu_count() or 1
+    if workers is None:
+        workers = max(1, nb_cpus // threads_per_job)
+    elif workers * (threads_per_job if backend == 'gurobi' else 1) > nb_cpus:
+        warnings.warn(f'{workers} workers with {threads_per_job} threads each oversubscribe {nb_cpus} CPUs')
+    options = dict(options, model=model, backend=backend)
+    order = sorted(range(len(instances)), key=lambda idx: -_size(instances[idx], model))
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(backend, threads_per_job),
+    ) as pool:
+        futures = {pool.submit(_solve_job, idx, instances[idx], options): idx for idx in order}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as error:
+                    yield futures[future], Result(None, None, None, [], None, {}, error)
+        finally:
+            for future in futures:
+                future.cancel()
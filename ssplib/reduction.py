@@ -0,0 +1,112 @@
+import collections
+import numpy as np
+
+from . import graph
+
+
+def _kill_dead_arcs(eq, geq, free):
+    # iteratively remove arcs forced to zero by one-sided rows:
+    # an equality row whose arcs all enter (or all leave) the node admits only
+    # zero flow, and so does every arc on the right-hand side of a row with
+    # lin >= lout if the left-hand side is empty (backward/forward reachability)
+    n = eq.shape[1]
+    alive = np.ones(n, dtype=bool)
+    blocks = []
+    for mat, one_sided in [(eq, True), (geq, False)]:
+        mat = mat.tocsr()
+        pos = (mat > 0).astype(np.int64)
+        neg = (mat < 0).astype(np.int64)
+        skip = np.asarray(mat[:, free].getnnz(axis=1) > 0).ravel() if free.any() else np.zeros(mat.shape[0], bool)
+        blocks.append(dict(
+            mat=mat, csc=mat.tocsc(), one_sided=one_sided, skip=skip,
+            npos=np.asarray(pos.sum(axis=1)).ravel(),
+            nneg=np.asarray(neg.sum(axis=1)).ravel(),
+        ))
+
+    def is_dead(block, r):
+        if block['skip'][r]:
+            return False
+        npos, nneg = block['npos'][r], block['nneg'][r]
+        if block['one_sided']:
+            return (npos == 0) != (nneg == 0)
+        return npos == 0 and nneg > 0
+
+    queue = collections.deque()
+    for b, block in enumerate(blocks):
+        for r in range(block['mat'].shape[0]):
+            if is_dead(block, r):
+                queue.append((b, r))
+    while queue:
+        b, r = queue.popleft()
+        block = blocks[b]
+        if not is_dead(block, r):
+            continue
+        mat = block['mat']
+        for a in mat.indices[mat.indptr[r]:mat.indptr[r + 1]]:
+            if not alive[a]:
+                continue
+            alive[a] = False
+            for b1, block1 in enumerate(blocks):
+                csc = block1['csc']
+                for r1, v in zip(csc.indices[csc.indptr[a]:csc.indptr[a + 1]], csc.data[csc.indptr[a]:csc.indptr[a + 1]]):
+                    block1['npos' if v > 0 else 'nneg'][r1] -= 1
+                    if is_dead(block1, r1):
+                        queue.append((b1, r1))
+    return alive
+
+
+def _contract_loss_chains(arcs, alive, keep):
+    # replace two loss arcs i -> j -> l by a single loss arc i -> l
+    # if no other arc touches the inner node j
+    arcs = arcs.copy()
+    size = int(max(arcs['start'].max(), arcs['end'].max())) + 1 if len(arcs) > 0 else 0
+    degree = np.bincount(arcs['start'][alive], minlength=size) + np.bincount(arcs['end'][alive], minlength=size)
+    is_loss = alive & (arcs['kind'] == graph.KIND_L) & (arcs['start'] != arcs['end'])
+    loss_in = dict(zip(arcs['end'][is_loss].tolist(), np.flatnonzero(is_loss).tolist()))
+    loss_out = dict(zip(arcs['start'][is_loss].tolist(), np.flatnonzero(is_loss).tolist()))
+    nb_contracted = 0
+    for j in sorted(set(loss_in) & set(loss_out)):
+        if degree[j] != 2 or j in keep:
+            continue
+        a, b = loss_in[j], loss_out[j]
+        end = arcs['end'][b]
+        arcs['end'][a] = end
+        alive[b] = False
+        loss_in[end] = a
+        nb_contracted += 1
+    return arcs, nb_contracted
+
+
+def reduce_graph(nodes, arcs, rows, w_in, w_out, geq_rows=None, geq_in=0, geq_out=0, lb=None, keep=()):
+    # remove arcs that cannot carry flow, contract chains of loss arcs and merge
+    # the exact duplicates created by the contraction (parallel arcs of different
+    # items or kinds are kept, none of them dominates another); rows/w_in/w_out describe the flow
+    # conservation constraints (as passed to graph.incidence), geq_* optional
+    # rows of the form sum(w_in) + sum(w_out) >= 0 and keep nodes not to contract
+    eq = graph.incidence(rows, arcs, w_in, w_out)
+    geq = graph.incidence(np.empty(0, dtype=np.int64) if geq_rows is None else geq_rows, arcs, geq_in, geq_out)
+    free = np.zeros(len(arcs), dtype=bool) if lb is None else np.asarray(lb) < 0
+
+    alive = _kill_dead_arcs(eq, geq, free)
+    nb_dead = len(arcs) - int(alive.sum())
+    arcs, nb_contracted = _contract_loss_chains(arcs, alive, set(keep))
+
+    reduced = arcs[alive]
+    nb_merged = 0
+    if nb_contracted > 0:
+        # contracted chains may run parallel to existing loss arcs
+        order = np.lexsort((reduced['kind'], reduced['item'], reduced['end'], reduced['start']))
+        srt = reduced[order]
+        dup = np.zeros(len(srt), dtype=bool)
+        dup[1:] = srt[1:] == srt[:-1]
+        reduced = reduced[np.sort(order[~dup])]
+        nb_merged = int(dup.sum())
+
+    used = np.union1d(reduced['start'], reduced['end'])
+    reduced_nodes = nodes[np.isin(nodes, used) | (nodes == 0)]
+    info = dict(
+        nodes_before=len(nodes), nodes_after=len(reduced_nodes),
+        arcs_before=len(arcs), arcs_after=len(reduced),
+        dead=nb_dead, contracted=nb_contracted, merged=nb_merged,
+    )
+    return reduced_nodes, reduced, info
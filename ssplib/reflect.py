@@ -1,140 +1,270 @@
-import gurobipy as gp
-from sortedcontainers import SortedSet
+import numpy as np
 import collections
 
+from . import backend as _backend
+from . import cache as _cache
+from . import decompose
+from . import graph
+from . import heuristics
+from . import reduction
+from . import stats as _stats
 from .larcflow import format_solution
 
-def create_reflect_arcs(inst):
+
+def arc_arrays(inst):
     threshold, lvec, bvec = inst
     m = len(lvec)
-    is_active = SortedSet([0])
-    souvenir = SortedSet([0])
+    is_active = np.zeros(threshold + 1, dtype=bool)
+    is_active[0] = True
+    souvenir = np.zeros(threshold + 1, dtype=bool)
+    souvenir[0] = True
 
     min_rpoint = threshold
-    arcs = set()
+    parts = []
     for item in range(m):
-        done = SortedSet()
-        for k in range(0, bvec[item]):
-            for start in list(reversed(souvenir)):
-                if start in done or start == threshold:
-                    continue
-                done.add(start)
-                end = start + 2 * lvec[item]
-                if end <= threshold:
-                    souvenir.add(end)
-                    kind = 's'
-                else:
-                    end = 2 * threshold - end
-                    kind = 'r'
-                    min_rpoint = min(min_rpoint, end)
-                arcs.add((start, end, item, kind))
-                is_active.add(end)
-
-    active_n = []
-    for j in is_active:
-        if j < min_rpoint or j == threshold:
-            continue
-        active_n.append(j)
-    active_n.append(threshold)
+        step = 2 * lvec[item]
+        # the first repetition starts from all nodes, every further one only
+        # from the nodes discovered by the previous repetition
+        frontier = np.flatnonzero(souvenir[:threshold])
+        for _rep in range(bvec[item]):
+            if len(frontier) == 0:
+                break
+            ends = frontier + step
+            fits = ends <= threshold
+            sends = ends[fits]
+            parts.append(graph.make_arcs(frontier[fits], sends, item))
+            # reflected endpoints of all starts beyond threshold - step at once
+            rends = 2 * threshold - ends[~fits]
+            if len(rends) > 0:
+                min_rpoint = min(min_rpoint, rends.min())
+                parts.append(graph.make_arcs(frontier[~fits], rends, item, graph.KIND_R))
+                is_active[rends] = True
+            is_active[sends] = True
+            frontier = sends[~souvenir[sends]]
+            souvenir[frontier] = True
+            frontier = frontier[frontier < threshold]
+    arcs = graph.concat(parts)
+
+    active_n = np.flatnonzero(is_active[:threshold])
+    active_n = np.append(active_n[active_n >= min_rpoint], threshold)
+    loss = graph.make_arcs(active_n[:-1], active_n[1:], -1, graph.KIND_L)
+    refl = graph.make_arcs([threshold], threshold, -1, graph.KIND_R)
+
+    return np.flatnonzero(is_active), int(min_rpoint), graph.concat([arcs, loss, refl])
+
+
+def create_reflect_arcs(inst):
+    # compatibility wrapper: sorted list of nodes, smallest reflected end and
+    # set of arc tuples
+    nodes, min_rpoint, arcs = arc_arrays(inst)
+    return nodes.tolist(), min_rpoint, graph.to_tuples(arcs)
+
+
+def _prefix(lvec, rest, cands, low, high):
+    # items of rest (restricted to cands) of total doubled length in [low, high]
+    cands = sorted(set(k for k in rest if k in cands))
+    uvec = [rest.count(k) for k in cands]
+    solution, length = heuristics.SubsetSumOracle()(max(low, 0), [2 * lvec[k] for k in cands], uvec)
+    if not max(low, 0) <= length <= high:
+        return None
+    return [cands[c] for c, count in solution.items() for _ in range(count)]
+
+
+def _reflect_range(threshold, step):
+    # lengths of prefixes starting below the threshold which reflect with an
+    # item of doubled length step to a node >= 0
+    return threshold - step + 1, min(threshold - 1, 2 * threshold - step)
 
-    for i in range(len(active_n) - 1):
-        arcs.add((active_n[i], active_n[i + 1], -1, 'l'))
-    arcs.add((threshold, threshold, -1, 'r'))
 
-    return is_active, min_rpoint, arcs
+def _split_pattern(threshold, lvec, pattern):
+    # split a pattern (with doubled lengths) into two paths from 0 given as
+    # lists of items, the second one (and with two reflections also the first
+    # one) ending with a reflected arc or both ending in the threshold; returns
+    # (path, path, nb of reflections)
+    copies = [k for k, count in sorted(pattern.items()) for _ in range(count)]
+    total = sum(2 * lvec[k] for k in copies)
+    items = sorted(set(copies), key=lambda k: -lvec[k])
+    # standard path and reflected path meeting it from below
+    for rk in items:
+        rest = list(copies)
+        rest.remove(rk)
+        step = 2 * lvec[rk]
+        low, high = _reflect_range(threshold, step)
+        # the standard path is nonempty and ends at most at the threshold
+        low, high = max(low, total - step - threshold), min(high, total - step - 1)
+        prefix = _prefix(lvec, rest, range(rk + 1), low, high)
+        if prefix is not None:
+            for k in prefix:
+                rest.remove(k)
+            return rest, prefix + [rk], 1
+    # two standard paths meeting at the threshold
+    if total == 2 * threshold:
+        path = _prefix(lvec, copies, copies, threshold, threshold)
+        if path is not None:
+            rest = list(copies)
+            for k in path:
+                rest.remove(k)
+            return path, rest, 0
+    # two reflected paths (joined by the reflection loop at the threshold)
+    for ra in items:
+        for rb in items:
+            rest = list(copies)
+            rest.remove(ra)
+            if rb not in rest or rb < ra:
+                continue
+            rest.remove(rb)
+            if any(k > rb for k in rest):
+                continue
+            low_a, high_a = _reflect_range(threshold, 2 * lvec[ra])
+            low_b, high_b = _reflect_range(threshold, 2 * lvec[rb])
+            left = sum(2 * lvec[k] for k in rest)
+            low, high = max(low_a, left - high_b), min(high_a, left - low_b)
+            prefix = _prefix(lvec, rest, range(ra + 1), low, high)
+            if prefix is not None:
+                for k in prefix:
+                    rest.remove(k)
+                return prefix + [ra], rest + [rb], 2
+    return None
 
 
-def create_variable_start(inst, is_active, patterns):
+def create_variable_start(inst, nodes, patterns):
+    # start values for all arcs; patterns which cannot be split into two paths
+    # are left out (which keeps the start feasible)
     threshold, lvec, bvec = inst
     vals = collections.Counter()
     for pattern in patterns:
-        start = 0
-        for item, count in pattern.items():
-            for _ in range(count):
+        split = _split_pattern(threshold, lvec, pattern)
+        if split is None:
+            continue
+        ends = []
+        for path in split[:2]:
+            start = 0
+            for item in path:
                 end = start + 2 * lvec[item]
                 if end <= threshold:
                     vals[(start, end, item, 's')] += 1
-                    start = end
-                    if start == threshold:
-                        start = 0
                 else:
                     end = 2 * threshold - end
                     vals[(start, end, item, 'r')] += 1
-                    start = 0
-    # TODO: set values for loss arcs (atm Gurobi fills the gaps for us)
+                start = end
+            ends.append(start)
+        if split[2] == 0:
+            # both paths end in the threshold (the reflection loop counts the pattern)
+            loss = []
+            vals[(threshold, threshold, -1, 'r')] += 1
+        elif split[2] == 1:
+            # loss arcs from the reflected end up to the end of the standard path
+            loss = [(ends[1], ends[0])]
+        else:
+            # loss arcs from both reflected ends up to the reflection loop
+            loss = [(ends[0], threshold), (ends[1], threshold)]
+            vals[(threshold, threshold, -1, 'r')] -= 1
+        for rend, end in loss:
+            # (the threshold is a node of the loss arcs even if it is not active)
+            idxs = nodes[np.searchsorted(nodes, rend):np.searchsorted(nodes, end)].tolist() + [end]
+            for i, j in zip(idxs, idxs[1:]):
+                vals[(i, j, -1, 'l')] += 1
     return vals
 
-def build(inst, patterns=None, bound=None, relaxed=False):
+
+def _lower_bounds(arcs):
+    lb = np.zeros(len(arcs))
+    lb[(arcs['kind'] == graph.KIND_R) & (arcs['item'] == -1)] = -np.inf
+    return lb
+
+
+def _rows(nodes, arcs, min_rpoint, threshold):
+    # nodes and in/out weights of the two node constraint blocks
+    is_s, is_l, is_r = [(arcs['kind'] == kind).astype(float) for kind in graph.KIND_CODES]
+    inner = nodes[nodes != 0]
+    rows = inner[(inner >= min_rpoint) & (inner < threshold)]
+    return inner, rows, [(is_s - is_l - is_r, is_l - is_s - is_r), (is_l + is_r, -is_l)]
+
+
+def create_graph(inst, reduce=False):
+    threshold, lvec, bvec = inst
+    nodes, min_rpoint, arcs = arc_arrays(inst)
+    info = None
+    if reduce:
+        inner, rows, weights = _rows(nodes, arcs, min_rpoint, threshold)
+        nodes, arcs, info = reduction.reduce_graph(
+            nodes, arcs, inner, *weights[0], geq_rows=rows, geq_in=weights[1][0], geq_out=weights[1][1],
+            lb=_lower_bounds(arcs), keep=[0, threshold],
+        )
+    return dict(nodes=nodes, arcs=arcs), dict(min_rpoint=min_rpoint, reduction=info)
+
+
+def build(inst, patterns=None, bound=None, relaxed=False, backend='gurobi', reduce=False, cache=None, stats=None):
     threshold, lvec, bvec = inst
     assert len(lvec) == len(bvec)
-    is_active, min_rpoint, arcs = create_reflect_arcs(inst)
-    arcs = gp.tuplelist(arcs)
+    with _stats.phase(stats, 'graph'):
+        arrays, meta = _cache.fetch(cache, inst, 'reflect', lambda: create_graph(inst, reduce), reduce=reduce)
+    nodes, arcs = arrays['nodes'], arrays['arcs']
+    min_rpoint, info = meta['min_rpoint'], meta['reduction']
+    _stats.record(stats, nodes=len(nodes), arcs=len(arcs), reduction=info)
 
-    model = gp.Model()
-    x = model.addVars(arcs, name='x', vtype=gp.GRB.CONTINUOUS if relaxed else gp.GRB.INTEGER, lb=0, ub=[
-        gp.GRB.INFINITY if arc[2] == -1 else bvec[arc[2]] for arc in arcs
-    ])
-    x[(threshold, threshold, -1, 'r')].lb = -gp.GRB.INFINITY
+    with _stats.phase(stats, 'matrices'):
+        inner, rows, weights = _rows(nodes, arcs, min_rpoint, threshold)
+        is_r = (arcs['kind'] == graph.KIND_R).astype(float)
 
-    # set start values
-    if patterns is not None:
-        for arc, count in create_variable_start(inst, is_active, patterns).items():
-            x[arc].start = count
+        lb = _lower_bounds(arcs)
+        problem = _backend.Problem(arcs, lb=lb, ub=graph.upper_bounds(arcs, bvec), integer=not relaxed)
 
-    for j in is_active:
-        if j == 0:
-            continue
-        sin = x.sum('*', j, '*', 's')
-        sout = x.sum(j, '*', '*', 's')
-        rin = x.sum('*', j, '*', 'r')
-        rout = x.sum(j, '*', '*', 'r')
-        lin = x.sum('*', j, '*', 'l')
-        lout = x.sum(j, '*', '*', 'l')
-        model.addConstr(sin + lout == rin + lin + rout + sout)
-        if j >= min_rpoint and j < threshold:
-            model.addConstr(lin + rin >= lout)
-
-    cout0 = x.sum(0, '*', '*', '*')
-    nb_refl = x.sum('*', '*', '*', 'r')
-    model.addConstr(cout0 == 2 * nb_refl)
-
-    for i in range(len(bvec)):
-        model.addConstr(x.sum('*', '*', i, '*') <= bvec[i])
-
-    obj = x.sum('*', '*', '*', 'r')
-    model.setObjective(obj, sense=gp.GRB.MAXIMIZE)
-
-    if bound is not None:
-        model.addConstr(obj <= bound)
+        # sin + lout == rin + lin + rout + sout
+        problem.add_constrs(graph.incidence(inner, arcs, *weights[0]), '=', np.zeros(len(inner)))
+        # lin + rin >= lout
+        problem.add_constrs(graph.incidence(rows, arcs, *weights[1]), '>', np.zeros(len(rows)))
+
+        # cout0 == 2 * nb_refl
+        cout0 = (arcs['start'] == 0).astype(float)
+        problem.add_constr(cout0 - 2 * is_r, '=', 0)
+
+        problem.add_constrs(graph.item_matrix(arcs, len(bvec)), '<', bvec, name='items')
+
+        obj = is_r
+        problem.set_objective(obj)
+
+        if bound is not None:
+            problem.add_constr(obj, '<', bound, name='bound')
+
+    # set start values (patterns='heuristic' for the best heuristic solution)
+    if patterns is not None:
+        with _stats.phase(stats, 'start'):
+            patterns = heuristics.start_patterns(inst, patterns)
+            vals = create_variable_start(inst, nodes, patterns)
+            problem.set_start(vals)
+    model = _backend.create(problem, backend, stats)
+    model._reduction = info
     return model
 
 
-def _find_path_fwd(arc0, arcs, vals, eps):
-    while vals[arc0] > eps:
+def _find_path_fwd(arc0, index):
+    vals = index.vals
+    while vals[arc0] > index.eps:
         minval = vals[arc0]
-        start, end, item, kind = arc0
-        next_start = end
-        assert kind == 's' or kind == 'r'
+        arc1 = arc0
+        assert index.kind[arc0] != graph.KIND_L
         current_path = [arc0]
-        while kind != 'r':
-            next_arcs = [
-                arc for arc in arcs.select(next_start)
-                if vals[arc] > eps and arc[3] != 'l'
-            ]
-            if len(next_arcs) == 0:
+        while index.kind[arc1] != graph.KIND_R:
+            arc1 = index.next_arc(index.end[arc1])
+            if arc1 is None:
                 break
-            arc1 = start, end, item, kind = next_arcs[0]
             minval = min(minval, vals[arc1])
             current_path.append(arc1)
-            next_start = end
 
         assert len(current_path) > 0
         for arc in current_path:
             vals[arc] -= minval
-        yield minval, current_path
+        yield minval, [index.key(arc) for arc in current_path]
+
 
+def _combine_paths(partial_s, partial_r, loss, eps):
+    # partial reflected paths bucketed by their end node
+    buckets = collections.defaultdict(collections.deque)
+    for entry in partial_r:
+        buckets[entry[1][-1][1]].append(entry)
+    loss_in = dict(zip(loss.end, range(len(loss))))
 
-def _combine_paths(partial_s, partial_r, arcs, vals, eps):
     solutions = []
     partial_s.sort(key=lambda p: p[1][-1][1])
 
@@ -145,74 +275,58 @@ def _combine_paths(partial_s, partial_r, arcs, vals, eps):
         while val > eps:
             minval = val
             for arc1 in pathl:
-                minval = min(minval, vals[arc1])
-
-            for i, (valr, pathr) in enumerate(partial_r):
-                endr = pathr[-1][1]
-                if endr == end:
-                    minval = min(minval, valr)
-                    solutions.append((minval, path + pathl + pathr))
-                    val -= minval
-                    for arc1 in pathl:
-                        vals[arc1] -= minval
-                    if valr - minval <= eps:
-                        partial_r.pop(i)
-                    else:
-                        partial_r[i] = (valr - minval, pathr)
-                    break
+                minval = min(minval, loss.vals[arc1])
+
+            bucket = buckets.get(end)
+            if bucket:
+                entry = bucket[0]
+                valr, pathr = entry
+                minval = min(minval, valr)
+                solutions.append((minval, path + [loss.key(arc1) for arc1 in pathl] + pathr))
+                val -= minval
+                for arc1 in pathl:
+                    loss.vals[arc1] -= minval
+                if valr - minval <= eps:
+                    bucket.popleft()
+                    entry[0] = 0
+                else:
+                    entry[0] = valr - minval
             else:
-                next_arcs = [
-                    arc for arc in arcs.select('*', end, -1, 'l')
-                    if vals[arc] > eps
-                ]
-                assert len(next_arcs) == 1
-                arc1 = next_arcs[0]
-                end = arc1[0]
-                minval = min(minval, vals[arc1])
+                arc1 = loss_in.get(end)
+                assert arc1 is not None and loss.vals[arc1] > eps
+                end = loss.start[arc1]
                 pathl.append(arc1)
     return solutions
 
-def _name2tuple(name):
-    i, j, k, t = name[2:-1].split(',')
-    return int(i), int(j), int(k), t
 
+@_stats.timed('extract')
 def extract_solution(inst, model, eps=1e-6):
     threshold, lvec, bvec = inst
 
-    vals = gp.tupledict([
-        (_name2tuple(v.varName), v.x)
-        for v in model.getVars()
-        if v.x > eps
-    ])
-    arcs = vals.keys()
+    index = decompose.flow_index(model, eps, kinds=[graph.KIND_S, graph.KIND_R])
+    loss = decompose.flow_index(model, eps, kinds=[graph.KIND_L])
 
     partial_s = []
     partial_r = []
-    for arc0 in arcs.select(0):
-        for val, path in _find_path_fwd(arc0, arcs, vals, eps):
-            (partial_r if path[-1][-1] == 'r' else partial_s).append((val, path))
-
-    solutions = _combine_paths(partial_s, partial_r, arcs, vals, eps)
-
-    if len(partial_r) > 0:
-        for val, path in partial_r:
-            while val > eps:
-                pathl = []
-                arc1 = path[-1]
-                end = arc1[1]
-                minval = val
-                while end != threshold:
-                    next_arcs = [
-                        arc for arc in arcs.select(end, '*', -1, 'l')
-                        if vals[arc] > eps
-                    ]
-                    assert len(next_arcs) == 1
-                    arc1 = next_arcs[0]
-                    end = arc1[1]
-                    minval = min(minval, vals[arc1])
-                    pathl.append(arc1)
-                for arc in pathl:
-                    vals[arc] -= minval
-                solutions.append((minval, path + pathl + ['R']))
-                val -= minval
+    for arc0 in index.out_arcs(0):
+        for val, path in _find_path_fwd(arc0, index):
+            (partial_r if path[-1][-1] == 'r' else partial_s).append([val, path])
+
+    solutions = _combine_paths(partial_s, partial_r, loss, eps)
+
+    for val, path in partial_r:
+        while val > eps:
+            pathl = []
+            end = path[-1][1]
+            minval = val
+            while end != threshold:
+                arc1 = loss.next_arc(end)
+                assert arc1 is not None
+                end = loss.end[arc1]
+                minval = min(minval, loss.vals[arc1])
+                pathl.append(arc1)
+            for arc in pathl:
+                loss.vals[arc] -= minval
+            solutions.append((minval, path + [loss.key(arc) for arc in pathl] + ['R']))
+            val -= minval
     return [format_solution(lvec, v, sol) for v, sol in solutions]
@@ -0,0 +1,89 @@
+import contextlib
+import functools
+import time
+import tracemalloc
+
+
+class Stats:
+    # opt-in instrumentation of building, solving and extraction: wall time
+    # (and with memory=True the peak of traced memory allocated on top of the
+    # memory in use at the start) per phase, graph and model sizes and the
+    # trajectory (time, incumbent, bound) of the solver
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = {}
+        self.sizes = {}
+        self.trajectory = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            used = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, dict(time=0.0, calls=0))
+            entry['time'] += time.perf_counter() - t0
+            entry['calls'] += 1
+            if self.memory:
+                entry['peak'] = max(entry.get('peak', 0), tracemalloc.get_traced_memory()[1] - used)
+
+    def record(self, **sizes):
+        self.sizes.update(sizes)
+
+    def callback(self, model, where):
+        # gurobipy callback appending changes of incumbent or bound
+        import gurobipy as gp
+        if where != gp.GRB.Callback.MIP:
+            return
+        point = (
+            model.cbGet(gp.GRB.Callback.RUNTIME),
+            model.cbGet(gp.GRB.Callback.MIP_OBJBST),
+            model.cbGet(gp.GRB.Callback.MIP_OBJBND),
+        )
+        if len(self.trajectory) == 0 or self.trajectory[-1][1:] != point[1:]:
+            self.trajectory.append(point)
+
+    def to_dict(self):
+        return dict(phases=self.phases, sizes=self.sizes, trajectory=self.trajectory)
+
+
+def phase(stats, name):
+    return contextlib.nullcontext() if stats is None else stats.phase(name)
+
+
+def record(stats, **sizes):
+    if stats is not None:
+        stats.record(**sizes)
+
+
+def timed(name):
+    # decorator adding an optional stats argument which times calls as a phase
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, stats=None, **kwargs):
+            with phase(stats, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def optimize(model, stats=None):
+    # model.optimize() recording the solver trajectory (incumbent and bound
+    # changes during a gurobipy MIP solve and the final values)
+    from . import backend as _backend
+    if stats is None:
+        model.optimize()
+        return model
+    with stats.phase('optimize'):
+        if model.IsMIP and hasattr(model, 'cbGet'):
+            model.optimize(stats.callback)
+        else:
+            model.optimize()
+    if model.status == _backend.OPTIMAL:
+        stats.trajectory.append((model.Runtime, model.objVal, model.ObjBound if model.IsMIP else model.objVal))
+    return model
@@ -0,0 +1,40 @@
+import pytest
+
+import ssplib
+
+
+@pytest.mark.parametrize('model', list(ssplib.incremental.MODELS))
+@pytest.mark.parametrize('relaxed', [False, True])
+def test_highs_empty_model(model, relaxed):
+    # no item fits, so most graphs have no arcs at all
+    m = ssplib.incremental.MODELS[model].build((20, [7, 5], [0, 0]), relaxed=relaxed, backend='highs')
+    m.setParam('OutputFlag', 0)
+    m.optimize()
+    assert m.status == ssplib.backend.OPTIMAL
+    assert m.objVal == 0
+
+
+def test_gurobi_relax_copy_without_arcs():
+    pytest.importorskip('gurobipy')
+    inst = 10, [6, 5, 4, 3], [1, 1, 2, 4]
+    model = ssplib.arcflow.build(inst)
+    model.setParam('OutputFlag', 0)
+    relaxed = model.relax()
+    relaxed.optimize()
+    with pytest.raises(ValueError, match='backend.relax'):
+        ssplib.arcflow.extract_solution(inst, relaxed)
+    relaxed = ssplib.backend.relax(model)
+    relaxed.optimize()
+    solution = ssplib.arcflow.extract_solution(inst, relaxed)
+    assert sum(val for val, _, _ in solution) == pytest.approx(relaxed.objVal)
+
+
+def test_highs_relax_copies_constraints():
+    inst = 10, [6, 5, 4, 3], [1, 1, 2, 4]
+    model = ssplib.arcflow.build(inst, backend='highs')
+    model.setParam('OutputFlag', 0)
+    relaxed = ssplib.backend.relax(model)
+    ssplib.backend.set_rhs(relaxed, 'items', [0, 0, 0, 0])
+    ssplib.backend.set_bounds(relaxed, ub=[0] * relaxed.numVars)
+    model.optimize()
+    assert model.objVal == pytest.approx(3)
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from ssplib import cache
+from ssplib import reflect
+
+INST = 10, [6, 5, 4, 3], [1, 1, 2, 4]
+
+
+def test_round_trip(tmp_path):
+    graphs = cache.GraphCache(str(tmp_path))
+    calls = []
+
+    def create():
+        calls.append(1)
+        return reflect.create_graph(INST)
+
+    arrays, meta = graphs.fetch(INST, 'reflect', create, reduce=False)
+    cached, cached_meta = graphs.fetch(INST, 'reflect', create, reduce=False)
+    assert len(calls) == 1
+    assert sorted(cached) == sorted(arrays)
+    for name in arrays:
+        assert np.array_equal(cached[name], arrays[name])
+    assert cached_meta == meta
+    # other options or instances are other entries
+    graphs.fetch(INST, 'reflect', create, reduce=True)
+    graphs.fetch((10, [6, 5, 4, 3], [1, 1, 2, 3]), 'reflect', create, reduce=False)
+    assert len(calls) == 3
+    assert cache.fetch(None, INST, 'reflect', create) is not None
+    assert len(calls) == 4
+
+
+def test_build_from_cache(tmp_path):
+    graphs = cache.GraphCache(str(tmp_path))
+    values = []
+    for _ in range(2):
+        model = reflect.build(INST, relaxed=True, backend='highs', cache=graphs)
+        model.setParam('OutputFlag', 0)
+        model.optimize()
+        values.append(model.objVal)
+    assert len(os.listdir(tmp_path)) == 1
+    assert values[0] == values[1]
+
+
+def test_eviction(tmp_path):
+    graphs = cache.GraphCache(str(tmp_path), max_bytes=2 ** 20)
+    keys = []
+    for n in range(3):
+        key = graphs.key(INST, 'test', n=n)
+        graphs.store(key, dict(data=np.zeros(2 ** 16)), dict(n=n))
+        # the first entry is the least recently used one
+        os.utime(os.path.join(str(tmp_path), key), (n, n))
+        keys.append(key)
+    # 3 * 512 kB do not fit into 1 MB, so the oldest entry went first
+    assert graphs.load(keys[0]) is None
+    assert graphs.load(keys[2])[1] == dict(n=2)
+    graphs.max_bytes = 0
+    graphs.evict()
+    assert os.listdir(tmp_path) == []
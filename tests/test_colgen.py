@@ -0,0 +1,49 @@
+import pytest
+
+from ssplib import arcflow
+from ssplib import colgen
+from ssplib import heuristics
+
+INSTANCES = [
+    (10, [6, 5, 4, 3], [1, 1, 2, 4]),
+    (24, [15, 14, 11, 10, 5, 4], [3, 3, 5, 4, 3, 1]),
+    (35, [30, 20, 13, 11, 9, 8], [5, 3, 5, 4, 3, 4]),
+    (100, [60, 45, 20, 1], [3, 2, 5, 7]),
+    (7, [7, 3], [2, 5]),
+]
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+def test_solve(inst):
+    # same bound as the LP relaxation of the arcflow model
+    threshold, lvec, bvec = inst
+    value, solution = colgen.solve(inst)
+    relaxed = arcflow.build(inst, relaxed=True, backend='highs')
+    relaxed.setParam('OutputFlag', 0)
+    relaxed.optimize()
+    assert value == pytest.approx(relaxed.objVal)
+    assert sum(val for val, _, _ in solution) == pytest.approx(value)
+    used = [0.0] * len(lvec)
+    for val, length, items in solution:
+        assert length == sum(items) >= threshold
+        assert length - min(items) < threshold
+        for lk in items:
+            used[lvec.index(lk)] += val
+    assert all(u <= b + 1e-6 for u, b in zip(used, bvec))
+
+
+def test_solve_empty():
+    assert colgen.solve((10, [6, 3], [1, 1])) == (0.0, [])
+
+
+def test_price():
+    threshold, lvec, bvec = 10, [6, 5, 4, 3], [1, 1, 2, 4]
+    duals = [0.9, 0.3, 0.4, 0.2]
+    patterns = colgen.price(threshold, lvec, bvec, duals, nb_patterns=5)
+    # cheapest minimal pattern: 5 + 3 + 3 at cost 0.7
+    assert patterns[0] == ({1: 1, 3: 2}, pytest.approx(0.7))
+    costs = [cost for _, cost in patterns]
+    assert costs == sorted(costs)
+    for pattern, cost in patterns:
+        heuristics.check_solution((threshold, lvec, bvec), [pattern])
+        assert cost == pytest.approx(sum(duals[k] * c for k, c in pattern.items()))
@@ -0,0 +1,29 @@
+import pytest
+
+from ssplib import data
+
+INSTANCES = [
+    (10, [12, 10, 6, 5, 4, 3], [1, 2, 1, 1, 2, 4]),
+    (7, [7, 3], [2, 5]),
+    (20, [25], [3]),
+    (100, [60, 45, 20, 1], [3, 2, 5, 7]),
+]
+
+
+def test_formats_give_same_instances(tmp_path):
+    text, binary = str(tmp_path / 'inst.dat'), str(tmp_path / 'inst.bin')
+    data.write(text, INSTANCES)
+    data.write_binary(binary, INSTANCES)
+    # items not shorter than the threshold are dropped in both formats
+    expected = [data.strip_large_parts(inst) for inst in INSTANCES]
+    assert expected[1] == (7, [3], [5])
+    for name in [text, binary]:
+        assert list(data.read(name)) == expected
+        dataset = data.open_dataset(name)
+        assert list(dataset) == expected
+        assert [dataset[idx] for idx in range(len(dataset))] == expected
+
+
+def test_dataset_is_abstract():
+    with pytest.raises(TypeError):
+        data.Dataset()
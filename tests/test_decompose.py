@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import ssplib
+from ssplib import decompose
+
+INSTANCES = [
+    (28, [22, 18, 15, 13, 12, 11], [4, 0, 2, 0, 3, 3]),
+    (60, [29, 26, 24, 15, 13, 8, 5], [1, 1, 1, 2, 1, 1, 1]),
+    (97, [45, 38, 33, 21, 17, 9], [3, 2, 4, 3, 5, 6]),
+]
+
+
+def circulation(arcs):
+    # sum of cycles of the graph (the part of a unit flow on all arcs removed
+    # by cancel_cycles)
+    ones = np.ones(len(arcs))
+    return ones - decompose.cancel_cycles(arcs, ones)
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+@pytest.mark.parametrize('model', ['larcflow', 'mitm'])
+def test_cancel_cycles(inst, model):
+    arcs = ssplib.incremental.MODELS[model].create_graph(inst)[0]['arcs']
+    circ = circulation(arcs)
+    assert circ.sum() > 0
+    # a circulation is balanced in every node
+    nodes = np.union1d(arcs['start'], arcs['end'])
+    assert np.allclose(ssplib.graph.incidence(nodes, arcs) @ circ, 0)
+    assert np.allclose(decompose.cancel_cycles(arcs, circ), 0)
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+@pytest.mark.parametrize('model', ['larcflow', 'mitm'])
+def test_extract_with_cycles(inst, model):
+    module = ssplib.incremental.MODELS[model]
+    m = module.build(inst, relaxed=True, backend='highs')
+    m.setParam('OutputFlag', 0)
+    m.optimize()
+    # the same solution with flow circulating on cycles
+    m.X = m.X + 0.5 * circulation(m._arcs)
+    solution = module.extract_solution(inst, m)
+    assert sum(val for val, _, _ in solution) == pytest.approx(m.objVal)
+    assert all(length >= inst[0] for _, length, _ in solution)
+
+
+def test_reusable_mitm_gurobi():
+    pytest.importorskip('gurobipy')
+    reusable = ssplib.incremental.ReusableModel(
+        28, [22, 18, 15, 13, 12, 11], [5, 5, 5, 6, 3, 4], model='mitm', backend='gurobi', relaxed=True,
+    )
+    bvec = [4, 0, 2, 0, 3, 3]
+    m = reusable.solve(bvec)
+    solution = reusable.extract_solution(bvec)
+    assert sum(val for val, _, _ in solution) == pytest.approx(m.objVal)
@@ -0,0 +1,36 @@
+import pytest
+
+from ssplib import estimate
+from ssplib import incremental
+from test_graph import INSTANCES
+
+INST = 100, [60, 45, 20, 1], [3, 2, 5, 7]
+
+
+def test_select_model_given_without_budget(monkeypatch):
+    # a given model is neither estimated nor checked against the available memory
+    monkeypatch.setattr(estimate, 'available_memory', lambda: 0)
+    monkeypatch.setattr(estimate, 'SIZES', {})
+    assert estimate.select_model(INST, 'reflect') == 'reflect'
+
+
+def test_select_model_budget():
+    with pytest.raises(MemoryError):
+        estimate.select_model(INST, 'reflect', memory_budget=1)
+    with pytest.raises(MemoryError):
+        estimate.select_model(INST, 'auto', memory_budget=1)
+    assert estimate.select_model(INST, 'reflect', memory_budget=2 ** 30) == 'reflect'
+    sizes = {name: estimate.graph_size(INST, name)['nb_nzs'] for name in estimate.SIZES}
+    assert estimate.select_model(INST, 'auto', memory_budget=2 ** 30) == min(sizes, key=sizes.get)
+
+
+@pytest.mark.parametrize('model', list(estimate.SIZES))
+def test_graph_size(model):
+    # counts from the node masks are those of the generated graphs
+    for inst in INSTANCES[:50]:
+        graph = incremental.MODELS[model].create_graph(inst)[0]
+        size = estimate.graph_size(inst, model)
+        assert size['nodes'] == len(graph['nodes'])
+        assert size['arcs'] == len(graph['arcs'])
+        nb_item_arcs = int((graph['arcs']['item'] >= 0).sum())
+        assert estimate.SIZES[model](inst) == (len(graph['nodes']), len(graph['arcs']), nb_item_arcs)
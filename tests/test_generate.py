@@ -0,0 +1,80 @@
+import itertools
+
+import pytest
+
+import ssplib
+from ssplib import generate
+
+CASES = [(threshold, n, exact_n) for threshold in [1, 2, 5, 9] for n in [0, 1, 3] for exact_n in [False, True]]
+
+
+def multisets(threshold, n, exact_n):
+    lo = 1 if exact_n else 0
+    return list(itertools.combinations_with_replacement(range(lo, threshold), n))
+
+
+def items_of(inst, n, exact_n):
+    # multiset of all() (with zeros for missing items) of an instance
+    _, lvec, bvec = inst
+    items = [li for li, bi in zip(lvec, bvec) for _ in range(bi)]
+    return tuple(sorted(items + [0] * (n - len(items))))
+
+
+@pytest.mark.parametrize('threshold, n, exact_n', CASES)
+def test_count_rank_unrank(threshold, n, exact_n):
+    expected = multisets(threshold, n, exact_n)
+    assert generate.count(threshold, n, exact_n) == len(expected)
+    for index, items in enumerate(expected):
+        assert generate.rank(items, threshold, exact_n) == index
+        assert generate.unrank(index, threshold, n, exact_n) == items
+
+
+@pytest.mark.parametrize('threshold, n, exact_n', CASES)
+def test_ranked_matches_all(threshold, n, exact_n):
+    ranked = list(generate.ranked(threshold, n, exact_n))
+    assert [index for index, _ in ranked] == list(range(generate.count(threshold, n, exact_n)))
+    assert [inst for _, inst in ranked] == list(generate.all(threshold, n, exact_n, verbose=False))
+    # resuming from any index gives the rest
+    for start in range(len(ranked)):
+        assert list(generate.ranked(threshold, n, exact_n, start=start)) == ranked[start:]
+
+
+@pytest.mark.parametrize('nb_shards', [1, 2, 3, 7])
+def test_shards(nb_shards):
+    threshold, n = 8, 3
+    whole = list(generate.all(threshold, n, verbose=False))
+    parts = []
+    for rank in range(nb_shards):
+        lo, hi = generate.shard_range(threshold, n, rank, nb_shards)
+        shard = list(generate.all(threshold, n, shard=(rank, nb_shards), verbose=False))
+        assert len(shard) == hi - lo
+        parts += shard
+    assert parts == whole
+
+
+def test_count_empty_ranges():
+    assert generate.count(1, 0, True) == 1
+    assert generate.count(1, 2, True) == 0
+    assert list(generate.ranked(1, 2, True)) == []
+    assert list(generate.ranked(1, 0, True)) == [(0, (1, [], []))]
+
+
+@pytest.mark.parametrize('threshold', [6, 8, 9])
+def test_canonical_filter(threshold):
+    n = 3
+    kept = [inst for _, inst in generate.ranked(threshold, n, canonical=True)]
+    for _, inst in generate.ranked(threshold, n):
+        if len(inst[1]) == 0:
+            continue
+        if generate.is_canonical(inst):
+            assert inst in kept
+            assert generate.canonical_form(inst) == inst
+            continue
+        assert inst not in kept
+        # the equivalent instance of a smaller threshold and its index there
+        small = generate.canonical_form(inst)
+        assert small[0] < threshold
+        index = generate.rank(items_of(small, n, False), small[0])
+        assert generate.unrank(index, small[0], n) == items_of(small, n, False)
+        values = [ssplib.solve(i, model='arcflow', backend='highs').value for i in [inst, small]]
+        assert values[0] == values[1]
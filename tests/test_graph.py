@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+import ssplib
+
+
+# set-based arc generation of the original implementation (walking all nodes
+# for every item and repetition)
+def reference_arcflow(inst):
+    threshold, lvec, bvec = inst
+    is_active = {0}
+    arcs = set()
+    for item in range(len(lvec)):
+        for node in sorted(is_active, reverse=True):
+            if node == threshold:
+                continue
+            for rep in range(bvec[item]):
+                start = node + rep * lvec[item]
+                if start >= threshold:
+                    break
+                end = min(threshold, start + lvec[item])
+                arcs.add((start, end, item))
+                is_active.add(end)
+    return is_active, arcs
+
+
+def reference_larcflow(inst):
+    threshold, lvec, bvec = inst
+    is_active = {0}
+    min_shifted = threshold
+    arcs = set()
+    for item in range(len(lvec)):
+        for node in sorted(is_active, reverse=True):
+            for rep in range(bvec[item]):
+                start = node + rep * lvec[item]
+                if start >= threshold:
+                    break
+                end = start + lvec[item]
+                if end > threshold:
+                    start = threshold - lvec[item]
+                    end = threshold
+                    min_shifted = min(min_shifted, start)
+                arcs.add((start, end, item, 's'))
+                is_active.add(end)
+    is_active |= {arc[0] for arc in arcs}
+    active_n = sorted((j for j in is_active if min_shifted <= j < threshold), reverse=True)
+    for i in range(len(active_n) - 1):
+        arcs.add((active_n[i], active_n[i + 1], -1, 'l'))
+    return is_active, arcs
+
+
+def reference_reflect(inst):
+    threshold, lvec, bvec = inst
+    is_active = {0}
+    souvenir = {0}
+    min_rpoint = threshold
+    arcs = set()
+    for item in range(len(lvec)):
+        done = set()
+        for _ in range(bvec[item]):
+            for start in sorted(souvenir, reverse=True):
+                if start in done or start == threshold:
+                    continue
+                done.add(start)
+                end = start + 2 * lvec[item]
+                if end <= threshold:
+                    souvenir.add(end)
+                    kind = 's'
+                else:
+                    end = 2 * threshold - end
+                    kind = 'r'
+                    min_rpoint = min(min_rpoint, end)
+                arcs.add((start, end, item, kind))
+                is_active.add(end)
+    active_n = sorted(j for j in is_active if min_rpoint <= j < threshold) + [threshold]
+    for i in range(len(active_n) - 1):
+        arcs.add((active_n[i], active_n[i + 1], -1, 'l'))
+    arcs.add((threshold, threshold, -1, 'r'))
+    return is_active, min_rpoint, arcs
+
+
+def random_instances(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        threshold = rng.randint(1, 300)
+        lvec = sorted(set(rng.randint(1, threshold) for _ in range(rng.randint(1, 10))), reverse=True)
+        yield threshold, lvec, [rng.randint(0, 12) for _ in lvec]
+
+
+INSTANCES = list(random_instances(200)) + [(10, [6, 5, 4, 3], [1, 1, 2, 4]), (7, [7, 3], [2, 5]), (5, [2], [0])]
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+def test_arcflow_arcs(inst):
+    nodes, arcs = ssplib.arcflow.arc_arrays(inst)
+    ref_nodes, ref_arcs = reference_arcflow(inst)
+    assert set(nodes.tolist()) == ref_nodes
+    assert ssplib.graph.to_tuples(arcs, kind=False) == ref_arcs
+    assert len(arcs) == len(ref_arcs)
+    assert ssplib.arcflow.create_arcflow_arcs(inst) == (sorted(ref_nodes), ref_arcs)
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+def test_larcflow_arcs(inst):
+    nodes, arcs = ssplib.larcflow.arc_arrays(inst)
+    ref_nodes, ref_arcs = reference_larcflow(inst)
+    assert set(nodes.tolist()) == ref_nodes
+    assert ssplib.graph.to_tuples(arcs) == ref_arcs
+    assert len(arcs) == len(ref_arcs)
+    assert ssplib.larcflow.create_larcflow_arcs(inst) == (sorted(ref_nodes), ref_arcs)
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+def test_reflect_arcs(inst):
+    nodes, min_rpoint, arcs = ssplib.reflect.arc_arrays(inst)
+    ref_nodes, ref_rpoint, ref_arcs = reference_reflect(inst)
+    assert set(nodes.tolist()) == ref_nodes
+    assert min_rpoint == ref_rpoint
+    assert ssplib.graph.to_tuples(arcs) == ref_arcs
+    assert len(arcs) == len(ref_arcs)
+    assert ssplib.reflect.create_reflect_arcs(inst) == (sorted(ref_nodes), ref_rpoint, ref_arcs)
@@ -0,0 +1,84 @@
+import pytest
+
+import ssplib
+from ssplib import heuristics
+from test_graph import INSTANCES
+
+
+@pytest.mark.parametrize('inst, expected', [
+    # items longer than the threshold
+    ((20, [25], [3]), 3),
+    ((10, [12, 5], [1, 2]), 2),
+    ((10, [12, 10, 6, 3], [1, 2, 2, 3]), 4),
+    # items equal to the threshold
+    ((10, [10, 5], [2, 2]), 3),
+    ((10, [10], [4]), 4),
+])
+def test_heuristic_c_long_items(inst, expected):
+    solutions = heuristics.heuristic_c_solutions(inst)
+    heuristics.check_solution(inst, solutions)
+    assert len(solutions) == expected
+    assert heuristics.heuristic_c(inst) == expected
+    assert len(heuristics.best_solution(inst)) >= expected
+
+
+@pytest.mark.parametrize('inst', [
+    (100, [45, 38, 31, 27, 22, 17, 12, 9, 5], [8, 12, 6, 16, 10, 14, 18, 8, 20]),
+    (1000, [480, 333, 310, 250, 201, 150, 99, 51], [10, 12, 20, 15, 30, 25, 40, 30]),
+])
+def test_subset_sum_oracle(inst):
+    # patterns of minimal length while the multiplicities shrink, with most
+    # layers kept between the calls
+    threshold, lvec, bvec = inst
+    oracle = heuristics.SubsetSumOracle()
+    uvec = list(bvec)
+    nb_calls = 0
+    while sum(lk * uk for lk, uk in zip(lvec, uvec)) >= threshold:
+        _, expected = heuristics.extract_ssp_solution(threshold, lvec, list(uvec), backend='highs')
+        solution, length = oracle(threshold, lvec, uvec)
+        nb_calls += 1
+        assert length == expected
+        assert sum(lvec[k] * count for k, count in solution.items()) == length
+        assert length - lvec[max(solution)] < threshold
+    assert min(uvec) >= 0
+    # (each call needs one layer per item without the cache)
+    assert oracle.computed < nb_calls * len(lvec) / 2
+
+
+@pytest.mark.parametrize('inst', INSTANCES)
+def test_heuristic_c_solutions(inst):
+    solutions = heuristics.heuristic_c_solutions(inst)
+    heuristics.check_solution(inst, solutions)
+    assert len(solutions) == heuristics.heuristic_c(inst)
+    assert len(solutions) <= heuristics.upper_bound_a(inst)
+    assert len(heuristics.best_solution(inst)) >= len(solutions)
+
+
+# (as read from the datasets: reflect needs items shorter than the threshold)
+STRIPPED = [inst for inst in map(ssplib.data.strip_large_parts, INSTANCES[:40]) if len(inst[1]) > 0]
+
+
+@pytest.mark.parametrize('model', list(ssplib.incremental.MODELS))
+@pytest.mark.parametrize('inst', STRIPPED)
+def test_lp_rounding(inst, model):
+    module = ssplib.incremental.MODELS[model]
+    relaxed = module.build(inst, relaxed=True, backend='highs')
+    relaxed.setParam('OutputFlag', 0)
+    relaxed.optimize()
+    solution = module.extract_solution(inst, relaxed)
+    solutions = heuristics.lp_rounding(inst, solution)
+    heuristics.check_solution(inst, solutions)
+    assert len(solutions) <= relaxed.objVal + 1e-6
+    if model != 'reflect':
+        # at least the rounded down values of the LP patterns (reflect gives
+        # half patterns, with values summing up to twice the LP value)
+        assert len(solutions) >= sum(int(val + 1e-6) for val, _, _ in solution)
+
+
+def test_lp_rounding_residual():
+    # the rounded patterns leave 6 + 4 and 5 + 5 for the heuristics
+    inst = 10, [6, 5, 4], [2, 2, 2]
+    solution = [(1.5, 10, [6, 4]), (0.5, 10, [5, 5])]
+    solutions = heuristics.lp_rounding(inst, solution)
+    assert solutions[0] == {0: 1, 2: 1}
+    assert len(solutions) == 3
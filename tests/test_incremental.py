@@ -0,0 +1,26 @@
+import pytest
+
+from ssplib import incremental
+from test_graph import random_instances
+
+
+@pytest.mark.parametrize('model', list(incremental.MODELS))
+@pytest.mark.parametrize('reduce', [False, True])
+def test_enabled_arcs(model, reduce):
+    # arcs enabled from the masks are those of the generated graph for bvec
+    for threshold, lvec, bmax in random_instances(20, seed=1):
+        reusable = incremental.ReusableModel(threshold, lvec, bmax, model, relaxed=True, backend='highs', reduce=reduce)
+        for bvec in [bmax, [b // 2 for b in bmax], [0] * len(bmax)]:
+            sub = reusable.module.create_graph(reusable.inst(bvec), **reusable.graph_options)[0]['arcs']
+            assert (reusable.enabled(bvec) == incremental.enabled_arcs(reusable.model._arcs, sub)).all()
+
+
+@pytest.mark.parametrize('model', ['arcflow', 'larcflow', 'reflect'])
+def test_reusable_equals_fresh(model):
+    threshold, lvec, bmax = 30, [17, 13, 11, 7, 4], [3, 2, 4, 3, 5]
+    reusable = incremental.ReusableModel(threshold, lvec, bmax, model, relaxed=True, backend='highs')
+    for bvec in [[1, 2, 0, 3, 1], [3, 0, 2, 1, 5], [0, 0, 1, 0, 2]]:
+        fresh = incremental.MODELS[model].build((threshold, lvec, bvec), relaxed=True, backend='highs')
+        fresh.setParam('OutputFlag', 0)
+        fresh.optimize()
+        assert reusable.solve(bvec).objVal == pytest.approx(fresh.objVal)
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pytest
+
+from ssplib import backend as _backend
+from ssplib import heuristics
+from ssplib import incremental
+from ssplib import pipeline
+
+# instances closed by each stage of solve() (with lp=False, the last ones need the MIP)
+STAGES = [
+    ((10, [4], [1]), 0, 'bounds'),
+    ((49, [48, 45, 23], [5, 4, 0]), 4, 'heuristic'),
+    ((42, [34, 30, 17, 7], [4, 5, 6, 6]), 9, 'lp'),
+    ((24, [15, 14, 11, 10, 5, 4], [3, 3, 5, 4, 3, 1]), 8, 'rounding'),
+    ((16, [15, 12, 7, 6, 5, 3], [2, 3, 3, 1, 3, 4]), 7, 'rounding'),
+]
+
+
+def optimum(inst):
+    model = incremental.MODELS['arcflow'].build(inst, backend='highs')
+    model.setParam('OutputFlag', 0)
+    model.optimize()
+    return round(model.objVal)
+
+
+@pytest.mark.parametrize('model', list(incremental.MODELS))
+@pytest.mark.parametrize('inst, value, stage', STAGES)
+def test_solve(inst, value, stage, model):
+    for lp in [True, False]:
+        result = pipeline.solve(inst, model=model, backend='highs', lp=lp)
+        assert result.value == result.bound == value == optimum(inst)
+        assert result.stage == (stage if lp or stage in ['bounds', 'heuristic'] else 'mip')
+        assert result.error is None
+        # (the patterns are those of the best solution before the MIP)
+        assert len(result.patterns) == value or result.stage == 'mip'
+        heuristics.check_solution(inst, result.patterns)
+        assert set(result.times) >= {'bounds'}
+
+
+@pytest.mark.parametrize('model', list(incremental.MODELS))
+@pytest.mark.parametrize('inst, value, stage', STAGES[3:])
+def test_reduced_cost_fixing(inst, value, stage, model):
+    # fixing arcs for a value below the optimum keeps the optimum
+    module = incremental.MODELS[model]
+    relaxed = module.build(inst, relaxed=True, backend='highs')
+    relaxed.setParam('OutputFlag', 0)
+    relaxed.optimize()
+    fixed = pipeline.fixable_arcs(relaxed, value - 1)
+    values = []
+    for mask in [None, fixed]:
+        mip = module.build(inst, backend='highs')
+        mip.setParam('OutputFlag', 0)
+        if mask is not None:
+            _backend.fix_to_zero(mip, mask)
+        mip.optimize()
+        values.append(round(mip.objVal))
+    assert values == [value, value]
+    assert pipeline.solve(inst, model=model, backend='highs', fixing=True).value == value
+
+
+def test_fixable_arcs():
+    inst = 24, [15, 14, 11, 10, 5, 4], [3, 3, 5, 4, 3, 1]
+    relaxed = incremental.MODELS['arcflow'].build(inst, relaxed=True, backend='highs')
+    relaxed.setParam('OutputFlag', 0)
+    relaxed.optimize()
+    x = _backend.values(relaxed)
+    # arcs used by the LP solution are never fixed, with a higher value more arcs are
+    for value in range(9):
+        fixed = pipeline.fixable_arcs(relaxed, value)
+        assert not fixed[x > 1e-6].any()
+        assert (fixed <= pipeline.fixable_arcs(relaxed, value + 1)).all()
+    assert np.count_nonzero(pipeline.fixable_arcs(relaxed, 7)) > 0
+
+
+def test_solve_many():
+    instances = [inst for inst, _, _ in STAGES]
+    results = dict(pipeline.solve_many(instances, model='arcflow', backend='highs'))
+    assert sorted(results) == list(range(len(instances)))
+    for idx, (inst, value, stage) in enumerate(STAGES):
+        assert results[idx].value == value
+        assert results[idx].stage == stage
+        assert results[idx].model is None
+
+
+def test_solve_many_keeps_going_after_errors():
+    # the first two instances are closed by the heuristics, the last one needs
+    # a model, whose graph does not fit into one byte
+    instances = [
+        (10, [6, 5, 4, 3], [1, 1, 2, 4]), (100, [60, 45, 20, 1], [3, 2, 5, 7]),
+        (28, [22, 18, 15, 13, 12, 11], [4, 0, 2, 0, 3, 3]),
+    ]
+    results = dict(pipeline.solve_many(instances, model='auto', backend='highs', workers=1, memory_budget=1))
+    assert sorted(results) == [0, 1, 2]
+    assert [results[idx].value for idx in range(2)] == [3, 3]
+    assert all(results[idx].error is None for idx in range(2))
+    assert results[2].value is None
+    assert isinstance(results[2].error, MemoryError)
+
+
+def test_solve_many_warns_on_oversubscription():
+    with pytest.warns(UserWarning, match='oversubscribe'):
+        results = list(pipeline.solve_many([(10, [6, 5], [1, 1])], backend='highs', workers=(os.cpu_count() or 1) + 1))
+    assert len(results) == 1
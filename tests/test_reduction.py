@@ -0,0 +1,22 @@
+import pytest
+
+import ssplib
+
+
+@pytest.mark.parametrize('inst', [
+    # the reduction removes all arcs
+    (8, [1], [5]), (30, [2, 1], [5, 2]), (35, [9, 6], [2, 1]),
+    (20, [9, 7, 5], [2, 2, 3]), (50, [23, 17, 11, 4], [3, 2, 4, 5]),
+])
+@pytest.mark.parametrize('model', list(ssplib.incremental.MODELS))
+@pytest.mark.parametrize('relaxed', [False, True])
+def test_reduce_keeps_value(inst, model, relaxed):
+    module = ssplib.incremental.MODELS[model]
+    values = []
+    for reduce in [False, True]:
+        m = module.build(inst, relaxed=relaxed, backend='highs', reduce=reduce)
+        m.setParam('OutputFlag', 0)
+        m.optimize()
+        assert m.status == ssplib.backend.OPTIMAL
+        values.append(m.objVal)
+    assert values[0] == pytest.approx(values[1])
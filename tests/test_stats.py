@@ -0,0 +1,53 @@
+import pytest
+
+from ssplib import arcflow
+from ssplib import stats as _stats
+
+
+def test_phases():
+    stats = _stats.Stats()
+    for _ in range(2):
+        with stats.phase('work'):
+            sum(range(1000))
+    assert stats.phases['work']['calls'] == 2
+    assert stats.phases['work']['time'] > 0
+    assert 'peak' not in stats.phases['work']
+    with pytest.raises(ValueError):
+        with stats.phase('error'):
+            raise ValueError()
+    assert stats.phases['error']['calls'] == 1
+
+
+def test_memory():
+    stats = _stats.Stats(memory=True)
+    with stats.phase('alloc'):
+        data = bytearray(2 ** 20)
+    del data
+    assert stats.phases['alloc']['peak'] >= 2 ** 20
+
+
+def test_timed_and_record():
+    @_stats.timed('double')
+    def double(x):
+        return 2 * x
+
+    stats = _stats.Stats()
+    assert double(2) == 4
+    assert double(3, stats=stats) == 6
+    assert stats.phases['double']['calls'] == 1
+    _stats.record(None, ignored=1)
+    _stats.record(stats, a=1)
+    _stats.record(stats, b=2)
+    assert stats.to_dict() == dict(phases=stats.phases, sizes=dict(a=1, b=2), trajectory=[])
+
+
+def test_build_and_optimize():
+    inst = 10, [6, 5, 4, 3], [1, 1, 2, 4]
+    stats = _stats.Stats()
+    model = arcflow.build(inst, backend='highs', stats=stats)
+    model.setParam('OutputFlag', 0)
+    _stats.optimize(model, stats)
+    assert {'nodes', 'arcs', 'nb_vars', 'nb_constrs', 'nb_nzs'} <= set(stats.sizes)
+    assert stats.sizes['nb_vars'] == stats.sizes['arcs'] == model.numVars
+    assert stats.phases['optimize']['calls'] == 1
+    assert stats.trajectory == [(model.Runtime, model.objVal, model.objVal)]